@@ -14,10 +14,11 @@ from . op.smart_delete import SmartDelete
 from . op.smart_modify import SmartModify
 from . op.selection import SmartSelectLoop, SmartSelectRing
 from . op.smart_transform import SmartTranslate, CSMove, CSRotate, CSScale
-from . op.quick_lattice import QuickLattice, LatticeResolution2x2x2, LatticeResolution3x3x3, LatticeResolution4x4x4
+from . op.quick_lattice import QuickLattice, LatticeResolution2x2x2, LatticeResolution3x3x3, LatticeResolution4x4x4, LatticeResolutionAdaptive
 from . op.quick_pipe import QuickPipe
 from . op.rebase_cylinder import RebaseCylinder
 from . op.uv_functions import QuickRotateUv90Pos, QuickRotateUv90Neg, SeamsFromSharps, UvsFromSharps
+from . utils import cache
 from . utils.user_prefs import AddonPreferences, OBJECT_OT_addon_prefs_example, MenuPlaceholder, unregister_keymaps, get_enable_legacy_tools
 
 bl_info = {
@@ -49,7 +50,7 @@ classes = (VIEW3D_PT_Itools, VIEW3D_MT_PIE_SSC_Duplicate, VIEW3D_MT_PIE_SSC_New_
            QuickRotateUv90Pos, QuickRotateUv90Neg, UvsFromSharps,QuickPipe,
            MenuPlaceholder, SmartModify, LatticeResolution2x2x2,
            SnapPresetsOp, PropEditOp, TransformPivotPointOp,
-           LatticeResolution3x3x3, LatticeResolution4x4x4, QuickHpLpNamer, ChildrenVisibility)
+           LatticeResolution3x3x3, LatticeResolution4x4x4, LatticeResolutionAdaptive, QuickHpLpNamer, ChildrenVisibility)
 
 legacy_classes = (SmartExtrudeModal, SmartTranslate)
 
@@ -63,6 +64,9 @@ def register():
     # Load Custom Menus
     load_menus_itools()
 
+    # Cache invalidation, handlers are only installed once a tool caches something
+    cache.register()
+
     # Keymapping
 
     # register_keymaps()
@@ -73,6 +77,9 @@ def unregister():
     # Keymap removal
     unregister_keymaps()
 
+    # Drop cached data and depsgraph handlers
+    cache.unregister()
+
     # Unload Custom Menus
     unload_menus_itools()
 
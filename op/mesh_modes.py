@@ -1,16 +1,102 @@
 import bpy
+import numpy as np
 from .. utils import itools as itools
 from .. utils import dictionaries as dic
+from .. utils import topology as topology
+from .. utils import mesh as mesh_utils
 from ..utils.user_prefs import get_enable_sticky_selection  
 
 
-def store_sel_data(mode):
-    if mode == 'VERT':
-        dic.write("selected_verts", itools.get_selected(mode, item=False))
-    if mode == 'EDGE':
-        dic.write("selected_edges", itools.get_selected(mode, item=False))
-    if mode == 'FACE':
-        dic.write("selected_faces", itools.get_selected(mode, item=False))
+SELECTION_KEYS = {'VERT': "selected_verts",
+                  'EDGE': "selected_edges",
+                  'FACE': "selected_faces"}
+
+# Positions are only stored for selections up to this size, so the property stays small.
+# Bigger selections are dropped instead of remapped when the topology changes
+REMAP_LIMIT = 256
+
+
+def get_sel_source(obj):
+    # Mesh data outside edit mode, the edit BMesh inside
+    if obj.mode != 'EDIT':
+        return None, obj.data
+    return itools.get_bmesh(obj), None
+
+
+def get_mesh_objects():
+    # Meshes entering edit mode along with the active object
+    objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+    if bpy.context.object not in objects:
+        objects.insert(0, bpy.context.object)
+    return objects
+
+
+def get_fingerprint(bm, mesh):
+    if mesh is not None:
+        fingerprint = topology.mesh_fingerprint(mesh)
+    else:
+        fingerprint = topology.fingerprint(bm)
+
+    # ID properties only hold 32 bit ints
+    return list(fingerprint[:3]) + [fingerprint[3] & 0x7FFFFFFF]
+
+
+def store_sel_data(mode, obj=None):
+    # Stored as a bitset, one bit per element instead of one int per selected element.
+    # Outside edit mode the selection is read in one buffer copy, in edit mode it is
+    # still read element by element from the BMesh
+    if obj is None:
+        obj = bpy.context.object
+
+    bm, mesh = get_sel_source(obj)
+
+    if mesh is not None:
+        selection = itools.get_mesh_selection(mesh, mode)
+    else:
+        selection = itools.SelectionMask.from_bmesh(bm, mode)
+
+    data = {"count": len(selection.mask),
+            "bits": selection.pack().tolist(),
+            "fingerprint": get_fingerprint(bm, mesh)}
+
+    # Positions of the selected elements, to find them again if the topology changes
+    if 0 < len(selection) <= REMAP_LIMIT:
+        centers = mesh_utils.element_centers(mode, bm, mesh, obj, indexes=selection.indexes().tolist())
+        data["positions"] = mesh_utils.spatial_hash(centers).tolist()
+
+    dic.write(SELECTION_KEYS[mode], data, obj)
+
+
+def remap_sel_data(mode, data, bm, mesh, obj):
+    # Elements sitting where the stored ones were, nothing if the positions were not stored
+    keys = mesh_utils.spatial_hash(mesh_utils.element_centers(mode, bm, mesh, obj))
+
+    if "positions" not in data:
+        return itools.SelectionMask(np.zeros(len(keys), dtype=bool))
+
+    return itools.SelectionMask(np.isin(keys, np.asarray(data["positions"], dtype=np.int32)))
+
+
+def read_sel_data(mode, obj=None):
+    if obj is None:
+        obj = bpy.context.object
+
+    data = dic.read(SELECTION_KEYS[mode], obj)
+
+    if not data:
+        return itools.SelectionMask(np.zeros(0, dtype=bool))
+
+    # Selections stored by older versions are plain index lists
+    if not hasattr(data, "keys"):
+        indexes = list(data)
+        return itools.SelectionMask.from_indexes(indexes, max(indexes) + 1)
+
+    # Stored indexes only mean something on the topology they were taken from
+    bm, mesh = get_sel_source(obj)
+    if "fingerprint" in data and list(data["fingerprint"]) != get_fingerprint(bm, mesh):
+        return remap_sel_data(mode, data, bm, mesh, obj)
+
+    return itools.SelectionMask.unpack(data["bits"], data["count"])
 
 
 def quick_selection(target_mode, safe_mode=False):
@@ -32,35 +118,45 @@ def quick_selection(target_mode, safe_mode=False):
         sticky = get_enable_sticky_selection()
 
         if current_mode in other_modes and current_object.type == 'MESH':
+            # Every object in edit mode keeps its own sticky selection
             if current_mode != 'OBJECT' and sticky:
-                itools.update_indexes()
-                store_sel_data(current_mode)
+                for obj in itools.each_edit_object(selected_only=False, isolate=False):
+                    itools.update_indexes()
+                    store_sel_data(current_mode, obj)
 
-            itools.set_mode(target_mode)
+            # Coming from object mode the stored selections are written to the meshes in one go
+            if sticky and current_mode == 'OBJECT':
+                for obj in get_mesh_objects():
+                    stored_selection = read_sel_data(target_mode, obj)
 
-            if sticky:
-                if target_mode == 'VERT':
-                    stored_selection = dic.read("selected_verts")
+                    if len(stored_selection) > 0:
+                        mesh = obj.data
+                        selection = stored_selection.resized(len(itools.get_mesh_elements(mesh, target_mode)))
+                        itools.set_mesh_selection(mesh, target_mode, selection)
 
-                elif target_mode == 'EDGE':
-                    stored_selection = dic.read("selected_edges")
+                itools.set_mode(target_mode)
 
-                elif target_mode == 'FACE':
-                    stored_selection = dic.read("selected_faces")
+            # Inside edit mode there is no bulk path, the BMesh is written element by element
+            elif sticky:
+                itools.set_mode(target_mode)
 
-                if len(stored_selection) > 0 and "itools" in bpy.context.object:
-                    itools.update_indexes()
-                    indexes = [index for index in stored_selection]
-                    if safe_mode:
+                for obj in itools.each_edit_object(selected_only=False, isolate=False):
+                    stored_selection = read_sel_data(target_mode, obj)
+
+                    if len(stored_selection) > 0:
+                        itools.update_indexes()
+                        indexes = stored_selection.indexes().tolist()
                         itools.select(indexes, item=False, replace=True, safe_mode=safe_mode)
-                    else:
-                        itools.select(indexes, item=False, replace=True)
+
+            else:
+                itools.set_mode(target_mode)
 
         elif current_mode == target_mode and current_object.type == 'MESH':
-            if sticky:
-                itools.update_indexes()
-                store_sel_data(current_mode)
+            objects = itools.get_edit_objects()
             itools.set_mode('OBJECT')
+            if sticky:
+                for obj in objects:
+                    store_sel_data(current_mode, obj)
 
         if current_object.type == 'GPENCIL':
             bpy.ops.object.mode_set(mode="EDIT_GPENCIL")
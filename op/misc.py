@@ -179,24 +179,25 @@ class QuickModifierToggle(bpy.types.Operator):
     def modifier_toggle(self, context):
         mode = itools.get_mode()
 
-        if mode in ['VERT', 'EDGE', 'FACE']:
-            itools.set_mode('OBJECT')
+        # Modifier flags dont need object mode, the guard drops the round trip
+        with itools.mode_guard() as guard:
+            guard.request('OBJECT')
+            selected = itools.get_selected('OBJECT')
 
-        selected = itools.get_selected()
+            for obj in selected:
+                if all(modifier.show_in_editmode and modifier.show_viewport for modifier in obj.modifiers):
+                    for modifier in obj.modifiers:
+                        modifier.show_in_editmode = False
+                        modifier.show_viewport = False
 
-        for obj in selected:
-            if all(modifier.show_in_editmode and modifier.show_viewport for modifier in obj.modifiers):
-                for modifier in obj.modifiers:
-                    modifier.show_in_editmode = False
-                    modifier.show_viewport = False
+                else:
+                    for modifier in obj.modifiers:
+                        modifier.show_in_editmode = True
+                        modifier.show_viewport = True
 
-            else:
-                for modifier in obj.modifiers:
-                    modifier.show_in_editmode = True
-                    modifier.show_viewport = True
+            guard.request(mode)
 
-        if mode in ['VERT', 'EDGE', 'FACE']:
-            itools.set_mode(mode)
+        context.view_layer.update()
 
     def execute(self, context):
         self.modifier_toggle(context)
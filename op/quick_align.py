@@ -3,6 +3,7 @@ from bpy_extras.view3d_utils import region_2d_to_vector_3d, region_2d_to_origin_
 from bpy.props import BoolProperty, EnumProperty
 from mathutils import Vector
 from .. utils import itools as itools
+from .. utils import raycast as raycast
 
 
 class QuickAlign(bpy.types.Operator):
@@ -88,19 +89,14 @@ class QuickAlign(bpy.types.Operator):
 
         view_vector = region_2d_to_vector_3d(region, rv3d, coord)
         ray_origin = region_2d_to_origin_3d(region, rv3d, coord, clamp=20)
-        ray_target = None
-        ray_target = ray_origin + (view_vector * 1000)
-        ray_target.normalized()
-
-        result, location, normal, index, object, matrix = context.scene.ray_cast(context.view_layer.depsgraph,
-                                                                                 ray_origin,
-                                                                                 ray_target)
-        
-        
+
+        # Selected objects are skipped, the target is whatever is behind them
+        hit = raycast.ray_cast(context, ray_origin, view_vector)
+
         if bpy.context.mode == 'OBJECT':
-            if result and not object.select_get():
-                return object.name
-    
+            if hit is not None:
+                return hit.object.name
+
         return 'World'
 
     @classmethod
@@ -1,8 +1,14 @@
 import bpy
+import numpy as np
 from bpy_extras.view3d_utils import region_2d_to_vector_3d, region_2d_to_origin_3d
-from bpy.props import BoolProperty, EnumProperty
-from mathutils import Vector
+from bpy.props import BoolProperty, EnumProperty, IntProperty
+from mathutils import Vector, Matrix
 from .. utils import itools as itools
+from .. utils import bounds as bounds
+
+
+# Bins of the per axis vertex histograms used by the adaptive resolution
+HISTOGRAM_BINS = 16
 
 
 def set_lattice_resolution(resolution):
@@ -11,12 +17,73 @@ def set_lattice_resolution(resolution):
     bpy.context.object.data.points_w = resolution
 
 
+def adaptive_resolution(lattice, max_resolution):
+    """
+    Points per lattice axis from the cage aspect ratio and how the enclosed verts spread along it.
+    Long axes with verts all along them get up to max_resolution, short or empty ones stay at 2.
+    """
+    # Target verts in the lattice space, where the cage spans -0.5 to 0.5
+    to_local = np.array(lattice.matrix_world.inverted(), dtype=np.float64)
+    local = [bounds.world_coords(obj) @ to_local[:3, :3].T + to_local[:3, 3]
+             for obj in get_lattice_targets(lattice)]
+    local = np.concatenate(local) if len(local) > 0 else np.zeros((0, 3))
+    local = local[np.all(np.abs(local) <= 0.5 + 1e-4, axis=1)]
+
+    dimensions = np.array(lattice.matrix_world.to_scale(), dtype=np.float64)
+    aspect = dimensions / dimensions.max()
+    resolution = []
+
+    for axis in range(3):
+        # Normalized entropy of the histogram, 1 for evenly spread verts, 0 for a single slab
+        counts = np.histogram(local[:, axis], bins=HISTOGRAM_BINS, range=(-0.5, 0.5))[0]
+        spread = 0.0
+        if counts.sum() > 0:
+            density = counts[counts > 0] / counts.sum()
+            spread = float(-(density * np.log(density)).sum() / np.log(HISTOGRAM_BINS))
+
+        resolution.append(2 + int(round((max_resolution - 2) * aspect[axis] * spread)))
+
+    return resolution
+
+
+# Lattice custom property listing the objects it deforms
+TARGETS_PROPERTY = "itools_targets"
+
+
+def get_lattice_targets(lattice):
+    # Lattices made before shared cages only deform the object they are named after
+    names = lattice.get(TARGETS_PROPERTY, [lattice.name[:-len(".Lattice")]])
+    return [bpy.data.objects[name] for name in names if name in bpy.data.objects]
+
+
+def find_lattice(obj):
+    lattice = bpy.data.objects.get(obj.name + ".Lattice")
+    if lattice is not None:
+        return lattice
+
+    # Objects sharing a cage named after another object
+    modifier = obj.modifiers.get("Lattice")
+    if modifier is not None and modifier.object is not None and modifier.object.name.endswith(".Lattice"):
+        return modifier.object
+
+
 class QuickLattice(bpy.types.Operator):
     bl_idname = "mesh.quick_lattice"
     bl_label = "Quick Lattice"
     bl_description = "Setup a Quick Lattice"
     bl_options = {'REGISTER', 'UNDO'}
 
+    shared: BoolProperty(
+        name="Shared Cage",
+        description="Fit one lattice around every selected object instead of the active one only",
+        default=True,
+    )
+    oriented: BoolProperty(
+        name="Oriented",
+        description="Fit the lattice to the oriented bounding box of the selection, tighter on rotated parts",
+        default=False,
+    )
+
     mouseX = 0.0
     initial_pos_x = 0.0
     sym_count = 0.0
@@ -28,71 +95,62 @@ class QuickLattice(bpy.types.Operator):
     senitivity = 0.01
     modkey = 0
 
-    def setup_lattice(self, context, selection):
-        if selection != []:
-            if context.mode == 'OBJECT':
-                verts = selection.data.vertices
-                vert_positions = [
-                    vert.co @ selection.matrix_world for vert in verts]
-                rotation = bpy.data.objects[selection.name].rotation_euler
-
-            elif context.mode == 'EDIT_MESH':
-                bmesh = itools.get_bmesh()
-                minimum = Vector()
-                maximum = Vector()
-                mode = itools.get_mode()
-                selectionMode = (
-                    tuple(bpy.context.scene.tool_settings.mesh_select_mode))
-
-                if mode == 'VERT':
-                    verts = itools.get_selected()
-
-                elif mode == 'EDGE':
-                    edges = itools.get_selected()
-                    verts = [edge.verts for edge in edges]
-                    verts = [vert for vert_pair in verts for vert in vert_pair]
-                    verts = list(set(verts))
-
-                elif mode == 'FACE':
-                    faces = itools.get_selected()
-                    verts = [face.verts for face in faces]
-                    verts = [vert for vert_pair in verts for vert in vert_pair]
-                    verts = list(set(verts))
-
-            vert_indexes = [vert.index for vert in verts]
-            vert_positions = [(selection.matrix_world @ vert.co)
-                              for vert in verts]
-
-            # Make vertex group, assign verts and update viewlayer
-            itools.set_mode('OBJECT')
-
-            # Remove old vertex group if it existed
-            vg = selection.vertex_groups.get("lattice_group")
-            if vg != None:
-                selection.vertex_groups.remove(vg)
-
-            vg = selection.vertex_groups.new(name="lattice_group")
-            vg.add(vert_indexes, 1.0, 'ADD')
-            bpy.context.view_layer.update()
-            rotation = Vector()
+    def get_targets(self, context, selection):
+        # Meshes the lattice is set up for, the active one first
+        if not self.shared:
+            return [selection]
 
-            # Calculate positions
-            minimum = Vector()
-            maximum = Vector()
-
-            for axis in range(3):
-                poslist = [pos[axis] for pos in vert_positions]
-                maximum[axis] = max(poslist)
-                minimum[axis] = min(poslist)
+        if context.mode == 'EDIT_MESH':
+            return itools.get_edit_objects()
 
-            location = (maximum + minimum) / 2
-            dimensions = maximum - minimum
+        targets = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj != selection]
+        return [selection] + targets
 
-            # Make sure no axis is 0 as this caused the bug where you couldnt move the lattice.
-            for axis in range(3):
-                print(axis)
-                if dimensions[axis] == 0:
-                    dimensions[axis] = 0.001
+    def setup_lattice(self, context, selection):
+        if selection != []:
+            edit_mode = context.mode == 'EDIT_MESH'
+            targets = self.get_targets(context, selection)
+            itools.set_mode('OBJECT')
+            positions = []
+
+            deformed = {}
+
+            for obj in targets:
+                # Remove old vertex group if it existed
+                vg = obj.vertex_groups.get("lattice_group")
+                if vg != None:
+                    obj.vertex_groups.remove(vg)
+
+                # Selected verts are read from the mesh in bulk, edges and faces are flushed to them
+                if edit_mode:
+                    selected = itools.get_mesh_selection(obj.data, 'VERT')
+                    vert_indexes = selected.indexes()
+                else:
+                    vert_indexes = None
+
+                # Objects in edit mode without selection are left alone
+                if vert_indexes is not None and len(vert_indexes) == 0:
+                    continue
+
+                # The modifier deforms the whole mesh without a group, only partial selections need one
+                vertex_group = ""
+                if vert_indexes is not None and len(vert_indexes) < len(obj.data.vertices):
+                    vg = obj.vertex_groups.new(name="lattice_group")
+                    vg.add(vert_indexes.tolist(), 1.0, 'REPLACE')
+                    vertex_group = vg.name
+
+                deformed[obj] = vertex_group
+                positions.append(bounds.world_coords(obj, vert_indexes))
+
+            targets = [obj for obj in targets if obj in deformed]
+            if len(positions) == 0:
+                return
+
+            # Calculate positions, one cage around every target
+            lattice_bounds = bounds.fit(np.concatenate(positions), self.oriented)
+            location = Vector(lattice_bounds.center)
+            dimensions = Vector(lattice_bounds.dimensions)
+            rotation = Matrix(lattice_bounds.rotation.tolist()).to_euler()
 
             # Add Lattice
             bpy.ops.object.add(
@@ -106,60 +164,79 @@ class QuickLattice(bpy.types.Operator):
             lattice.location = location
             lattice.scale = dimensions
             lattice.rotation_euler = rotation
+            lattice[TARGETS_PROPERTY] = [obj.name for obj in targets]
 
-            bpy.context.view_layer.objects.active = selection
-            mod = selection.modifiers.new(name="Lattice", type='LATTICE')
-            mod.object = lattice
+            for obj in targets:
+                mod = obj.modifiers.new(name="Lattice", type='LATTICE')
+                mod.object = lattice
+                mod.vertex_group = deformed[obj]
+                obj.select_set(False)
 
-            # Make new vertex group
-            mod.vertex_group = "lattice_group"
+            # Select lattice and make it active, switch to edit mode
             bpy.context.view_layer.objects.active = lattice
-
-            # Deselect obj, select lattice and make it active, switch to edit mode
-            bpy.data.objects[selection.name].select_set(False)
             bpy.data.objects[lattice.name].select_set(True)
             bpy.ops.object.editmode_toggle()
 
     def apply_lattice(self, context, lattice):
-        if context.mode == 'EDIT_MESH':
-            bpy.ops.object.editmode_toggle()
-        obj = bpy.data.objects[lattice.name[:-8]]
-        bpy.data.objects[lattice.name].select_set(False)
-        bpy.data.objects[obj.name].select_set(True)
-        bpy.context.view_layer.objects.active = obj
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
 
-        # Fix for blender 2.90
-        version = bpy.app.version_string[:4]
+        targets = get_lattice_targets(lattice)
 
-        try:
-            version = float(version)
-        except ValueError:
-            version = float(version[:-1])
+        if any(obj.data.shape_keys is not None for obj in targets):
+            self.report({'ERROR'}, "Modifier cannot be applied to a mesh with shape keys")
+            return
 
-        if version >= 2.90:
-            bpy.ops.object.modifier_apply(modifier="Lattice")
-        else:
-            bpy.ops.object.modifier_apply(apply_as='DATA', modifier="Lattice")
+        # Every target is evaluated with only its lattice modifier enabled,
+        # the deformed positions are then written back in bulk
+        disabled = [modifier for obj in targets for modifier in obj.modifiers
+                    if modifier.show_viewport and not (modifier.type == 'LATTICE' and modifier.object == lattice)]
+
+        for modifier in disabled:
+            modifier.show_viewport = False
 
-        # Delete vertex group
-        vg = obj.vertex_groups.get("lattice_group")
-        if vg != None:
-            obj.vertex_groups.remove(vg)
+        depsgraph = context.evaluated_depsgraph_get()
+
+        for obj in targets:
+            deformed = obj.evaluated_get(depsgraph).to_mesh()
+            coords = itools.read_mesh_attribute(deformed.vertices, "co", np.float32)
+            obj.evaluated_get(depsgraph).to_mesh_clear()
+
+            if len(coords) == len(obj.data.vertices) * 3:
+                obj.data.vertices.foreach_set("co", coords)
+                obj.data.update()
+
+        for modifier in disabled:
+            modifier.show_viewport = True
+
+        for obj in targets:
+            modifier = obj.modifiers.get("Lattice")
+            if modifier is not None and modifier.object == lattice:
+                obj.modifiers.remove(modifier)
+
+            # Delete vertex group
+            vg = obj.vertex_groups.get("lattice_group")
+            if vg != None:
+                obj.vertex_groups.remove(vg)
 
         # Delete lattice
-        bpy.data.objects[obj.name].select_set(False)
-        bpy.data.objects.remove(bpy.data.objects[lattice.name])
-        bpy.data.objects[obj.name].select_set(True)
-        bpy.ops.object.mode_set(mode='EDIT')
+        bpy.data.objects.remove(lattice)
+
+        for obj in targets:
+            obj.select_set(True)
+
+        if len(targets) > 0:
+            context.view_layer.objects.active = targets[0]
+            bpy.ops.object.mode_set(mode='EDIT')
 
     def get_lattice(self, context, obj):
-        lattice = obj.name + ".Lattice"
-        if bpy.data.objects.get(lattice) is None:
+        lattice = find_lattice(obj)
+        if lattice is None:
             return False
         else:
             bpy.data.objects[obj.name].select_set(False)
-            bpy.data.objects[lattice].select_set(True)
-            context.view_layer.objects.active = bpy.data.objects[lattice]
+            lattice.select_set(True)
+            context.view_layer.objects.active = lattice
             bpy.ops.object.editmode_toggle()
             return True
 
@@ -168,7 +245,7 @@ class QuickLattice(bpy.types.Operator):
         mode = itools.get_mode()
         cond_a = mode in ['VERT', 'EDGE', 'FACE'] and len(
             itools.get_selected()) > 0
-        cond_b = mode == 'OBJECT' and len(context.selected_objects) == 1
+        cond_b = mode == 'OBJECT' and any(obj.type == 'MESH' for obj in context.selected_objects)
 
         if len(context.selected_objects) > 0:
             cond_c = context.selected_objects[0].type == 'LATTICE'
@@ -220,3 +297,30 @@ class LatticeResolution4x4x4(bpy.types.Operator):
     def execute(self, context):
         set_lattice_resolution(4)
         return{'FINISHED'}
+
+
+class LatticeResolutionAdaptive(bpy.types.Operator):
+    bl_idname = "mesh.lattice_resolution_adaptive"
+    bl_label = "Lattice Resolution Adaptive"
+    bl_description = "Set Lattice Resolution per axis from the shape and density of the deformed geometry"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    max_resolution: IntProperty(
+        name="Max Resolution",
+        description="Points along the longest, most evenly filled axis",
+        default=6,
+        min=2,
+        max=32,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.type == 'LATTICE'
+
+    def execute(self, context):
+        lattice = context.object
+        points_u, points_v, points_w = adaptive_resolution(lattice, self.max_resolution)
+        lattice.data.points_u = points_u
+        lattice.data.points_v = points_v
+        lattice.data.points_w = points_w
+        return{'FINISHED'}
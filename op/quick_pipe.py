@@ -59,11 +59,12 @@ class QuickPipe(bpy.types.Operator):
     def setup_pipe(self, context, selection):
         if selection != []:
             #Select object:
-            itools.set_mode('OBJECT')
-            base_obj = itools.get_selected('OBJECT')
+            with itools.mode_guard() as guard:
+                guard.request('OBJECT')
+                base_obj = itools.get_selected('OBJECT')
+                guard.request('EDGE')
 
             #Separate edge:
-            itools.set_mode('EDGE')
             bpy.ops.mesh.duplicate_move()
             bpy.ops.mesh.separate(type='SELECTED')
             bpy.ops.mesh.delete(type='EDGE')
@@ -194,9 +195,7 @@ class QuickPipe(bpy.types.Operator):
                 context.area.header_text_set(text=None)
                 bpy.types.SpaceView3D.draw_handler_remove(self.draw_handler, 'WINDOW')
 
-                #Switch between modes to force update UI
-                bpy.ops.object.mode_set(mode='EDIT')
-                bpy.ops.object.mode_set(mode='OBJECT')
+                itools.refresh_ui(context)
                 return {'FINISHED'}
 
         elif event.type in {'RIGHTMOUSE', 'ESC'}:  # Cancel
@@ -206,9 +205,7 @@ class QuickPipe(bpy.types.Operator):
             bpy.types.SpaceView3D.draw_handler_remove(self.draw_handler, 'WINDOW')
             context.area.header_text_set(text=None)
 
-            #Switch between modes to force update UI
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.object.mode_set(mode='OBJECT')
+            itools.refresh_ui(context)
 
             if self.first_run:
                 bpy.ops.object.delete(use_global=False, confirm=False)
@@ -2,6 +2,7 @@ import bpy
 import math
 import blf
 from bpy_extras.view3d_utils import region_2d_to_vector_3d, region_2d_to_origin_3d
+from ..utils import itools as itools
 from ..utils.user_prefs import get_radsym_hide_pivot
 from bpy.props import EnumProperty, IntProperty
 import datetime
@@ -272,9 +273,7 @@ class QuickRadialSymmetry(bpy.types.Operator):
                 context.area.header_text_set(text=None)
                 bpy.types.SpaceView3D.draw_handler_remove(self.draw_handler, 'WINDOW')
 
-                #Switch between modes to force update UI
-                bpy.ops.object.mode_set(mode='EDIT')
-                bpy.ops.object.mode_set(mode='OBJECT')
+                itools.refresh_ui(context)
                 return {'FINISHED'}
 
         elif event.type in {'RIGHTMOUSE', 'ESC'}:  # Cancel
@@ -283,9 +282,7 @@ class QuickRadialSymmetry(bpy.types.Operator):
             bpy.types.SpaceView3D.draw_handler_remove(self.draw_handler, 'WINDOW')
             context.area.header_text_set(text=None)
 
-            #Switch between modes to force update UI
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.object.mode_set(mode='OBJECT')
+            itools.refresh_ui(context)
 
             if self.first_run:
                 bpy.ops.object.modifier_remove(modifier="Radial Symmetry")
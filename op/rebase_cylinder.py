@@ -259,9 +259,7 @@ class RebaseCylinder(bpy.types.Operator):
                 context.area.header_text_set(text=None)
                 bpy.types.SpaceView3D.draw_handler_remove(self.draw_handler, 'WINDOW')
 
-                #Switch between modes to force update UI
-                bpy.ops.object.mode_set(mode='EDIT')
-                bpy.ops.object.mode_set(mode='OBJECT')
+                itools.refresh_ui(context)
                 return {'FINISHED'}
 
         elif event.type == 'M':  # Change Merge threshold
@@ -275,9 +273,7 @@ class RebaseCylinder(bpy.types.Operator):
             bpy.types.SpaceView3D.draw_handler_remove(self.draw_handler, 'WINDOW')
             context.area.header_text_set(text=None)
 
-            #Switch between modes to force update UI
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.object.mode_set(mode='OBJECT')
+            itools.refresh_ui(context)
 
             if self.first_run:
                 bpy.ops.object.delete(use_global=False, confirm=False)
@@ -1,4 +1,5 @@
 import bpy
+import bmesh
 from ..utils import itools as itools
 from ..utils import mesh as mesh
 from ..utils.user_prefs import get_enable_dissolve_faces, get_enable_dissolve_verts
@@ -10,6 +11,12 @@ class SmartDelete(bpy.types.Operator):
     bl_description = "Context Sensitive Deletion"
     bl_options = {'REGISTER', 'UNDO'}
 
+    def delete_edge_faces(cls, bm, selection):
+        # Every face touching the selection goes in a single delete
+        faces = {face for edge in selection for face in edge.link_faces}
+        bmesh.ops.delete(bm, geom=list(faces), context='FACES')
+        itools.update_edit_mesh()
+
     def smart_delete(cls, context):
         mode = itools.get_mode()
 
@@ -36,19 +43,13 @@ class SmartDelete(bpy.types.Operator):
                 selection = itools.get_selected()
                 if get_enable_dissolve_faces():
                     if mesh.is_border(selection):
-                        for edge in selection:
-                            for face in edge.link_faces:
-                                face.select = 1
-                        bpy.ops.mesh.delete(type='FACE')
+                        cls.delete_edge_faces(bm, selection)
 
                     else:
                         bpy.ops.mesh.dissolve_edges()
 
                 else:
-                    for edge in selection:
-                            for face in edge.link_faces:
-                                face.select = 1
-                            bpy.ops.mesh.delete(type='FACE')
+                    cls.delete_edge_faces(bm, selection)
 
             elif mode == 'FACE':
                 bpy.ops.mesh.delete(type='FACE')
@@ -59,5 +60,9 @@ class SmartDelete(bpy.types.Operator):
         return{'FINISHED'}
 
     def execute(self, context):
-        self.smart_delete(context)
+        if itools.get_mode() in ['VERT', 'EDGE', 'FACE']:
+            for obj in itools.each_edit_object():
+                self.smart_delete(context)
+        else:
+            self.smart_delete(context)
         return {'FINISHED'}
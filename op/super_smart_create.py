@@ -1,6 +1,8 @@
 import bpy
+import bmesh
 from ..utils import itools as itools
 from ..utils import mesh as mesh
+from ..utils import graph as graph
 from ..utils.user_prefs import get_f2_active, get_ssc_switch_modes
 
 class SuperSmartCreate(bpy.types.Operator):
@@ -9,32 +11,42 @@ class SuperSmartCreate(bpy.types.Operator):
     bl_description = "Context sensitive creation"
     bl_options = {'REGISTER', 'UNDO'}
 
+    def switch_mode(self, mode):
+        # Mode is shared by every object in edit mode, the switch waits until all of them ran
+        self.new_mode = mode
+
     def split_edge_select_vert(self):
         bpy.ops.mesh.subdivide()
         itools.update_indexes('ALL')
 
         if get_ssc_switch_modes():
-            selection = itools.get_selected()
-            new_selection = [vert for edge in selection for vert in edge.verts
-                             if all(edge in selection for edge in vert.link_edges)]
-            new_selection = itools.remove_duplicates(new_selection)
+            # Verts whose edges are all selected, the ones the subdivision created.
+            # Only the selected edges are looked at, the topology index would be rebuilt
+            # for the whole mesh after the subdivision
+            selection = set(itools.get_selected())
+            new_selection = itools.remove_duplicates([vert for edge in selection for vert in edge.verts
+                                                      if selection.issuperset(vert.link_edges)])
 
-            itools.set_mode('VERT')
-            itools.select(new_selection, replace=True)
+            itools.select(new_selection, 'VERT', replace=True)
+            self.switch_mode('VERT')
 
     def split_edges_make_loop(self, selection):
-        new_verts = []
+        # The whole ring is cut in one go, subdivide joins the cuts across the quads
+        bm = itools.get_bmesh()
+        ring_verts = {vert for edge in selection for vert in edge.verts}
+        result = bmesh.ops.subdivide_edges(bm, edges=selection, cuts=1, use_grid_fill=True)
+
+        new_verts = {element for element in result['geom_split'] + result['geom_inner']
+                     if isinstance(element, bmesh.types.BMVert) and element not in ring_verts}
 
-        for edge in selection:
-            itools.set_mode('EDGE')
-            itools.select(edge, replace=True)
-            self.split_edge_select_vert()
-            new_verts.append(itools.get_selected('VERT', item=False)[0])
+        # Faces outside the subdivide patterns (tris, ngons) get connected here
+        bmesh.ops.connect_verts(bm, verts=list(new_verts), check_degenerate=True)
+        itools.update_edit_mesh()
 
-        itools.set_mode('VERT')
-        itools.select(new_verts, replace=True, item=False)
-        bpy.ops.mesh.vert_connect()
-        itools.set_mode('EDGE')
+        new_loop = [edge for vert in new_verts for edge in vert.link_edges if edge.other_vert(vert) in new_verts]
+
+        itools.select(itools.remove_duplicates(new_loop), 'EDGE', replace=True)
+        self.switch_mode('EDGE')
 
     def connect_verts_to_last(self, selection):
         bm = itools.get_bmesh()
@@ -44,13 +56,19 @@ class SuperSmartCreate(bpy.types.Operator):
             if vert not in bm.select_history:
                 ordered_selection.append(vert)
 
+        # The history can still hold edges and faces after a select mode switch
         for item in bm.select_history:
-            ordered_selection.append(item)
+            if isinstance(item, bmesh.types.BMVert):
+                ordered_selection.append(item)
+
+        last = ordered_selection[-1]
 
-        for vert in ordered_selection:
-            itools.select([vert, ordered_selection[-1]], replace=True)
-            bpy.ops.mesh.vert_connect()
+        # Faces are checked as the sweep goes, earlier cuts can separate a vert from last
+        for vert in ordered_selection[:-1]:
+            if vert != last and not set(vert.link_faces).isdisjoint(last.link_faces):
+                bmesh.ops.connect_verts(bm, verts=[vert, last], check_degenerate=True)
 
+        itools.update_edit_mesh()
         itools.select(selection, replace=True)
 
     def quad_fill(self):
@@ -59,10 +77,7 @@ class SuperSmartCreate(bpy.types.Operator):
         itools.select(selection, 'EDGE', replace=True)
         bpy.ops.mesh.fill_grid()
 
-    def super_smart_create(self):
-
-        mode = itools.get_mode()
-
+    def super_smart_create(self, mode):
         if mode == 'OBJECT':
             if len(itools.get_selected()) > 0:
                 bpy.ops.wm.call_menu_pie(name="VIEW3D_MT_PIE_SSC_Duplicate")
@@ -99,21 +114,24 @@ class SuperSmartCreate(bpy.types.Operator):
             elif len(selection) == 1:
                 self.split_edge_select_vert()
 
-            elif mesh.is_border(selection):
-                bpy.ops.mesh.edge_face_add()
-                if get_ssc_switch_modes():
-                    itools.set_mode('FACE')
+            else:
+                selection_type = mesh.classify_edge_selection(selection)
+
+                if selection_type.border:
+                    bpy.ops.mesh.edge_face_add()
+                    if get_ssc_switch_modes():
+                        self.switch_mode('FACE')
 
-            elif mesh.is_ring(selection):
-                self.split_edges_make_loop(selection)
+                elif selection_type.ring:
+                    self.split_edges_make_loop(selection)
 
-            elif mesh.is_adjacent(selection, mode) and mesh.is_partial_border(selection):
-                bpy.ops.mesh.edge_face_add()
-                itools.set_mode('EDGE')
+                elif selection_type.adjacent and selection_type.partial_border:
+                    bpy.ops.mesh.edge_face_add()
+                    self.switch_mode('EDGE')
 
-            elif mesh.is_partial_border(selection):
-                bpy.ops.mesh.bridge_edge_loops()
-                itools.set_mode('EDGE')
+                elif selection_type.partial_border:
+                    bpy.ops.mesh.bridge_edge_loops()
+                    self.switch_mode('EDGE')
 
         # if Face is selected
         elif mode == 'FACE':
@@ -123,7 +141,7 @@ class SuperSmartCreate(bpy.types.Operator):
             if len(selection) == 1:
                 self.quad_fill()
 
-            elif len(selection) > 1 and len(mesh.organize_faces_by_continuity(selection)) == 2:
+            elif len(selection) > 1 and graph.count_components(itools.to_index(selection), 'FACE') == 2:
                 try:
                     bpy.ops.mesh.bridge_edge_loops()
 
@@ -149,5 +167,17 @@ class SuperSmartCreate(bpy.types.Operator):
                     bpy.ops.curve.select_less()
 
     def execute(self, context):
-        self.super_smart_create()
+        # Read once, a switch made for the first object must not change how the others are handled
+        mode = itools.get_mode()
+        self.new_mode = None
+
+        if mode in ['VERT', 'EDGE', 'FACE']:
+            for obj in itools.each_edit_object():
+                self.super_smart_create(mode)
+        else:
+            self.super_smart_create(mode)
+
+        if self.new_mode is not None:
+            itools.set_mode(self.new_mode)
+
         return{'FINISHED'}
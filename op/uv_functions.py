@@ -12,11 +12,7 @@ def selected_uv_verts_pos():
 
 
 def sharp_to_seams(context, selection=[]):
-    mode = itools.get_mode()
-    me = context.object.data
-
-    itools.set_mode('EDGE')
-
+    # Works on the current edit object, the whole mesh if nothing is given
     if len(selection) < 1:
         bm = itools.get_bmesh()
         selection = [edge for edge in bm.edges]
@@ -28,8 +24,12 @@ def sharp_to_seams(context, selection=[]):
         if not edge.smooth:
             edge.seam = True
 
-    itools.set_mode('OBJECT')
-    itools.set_mode(mode)
+    itools.update_edit_mesh(destructive=False)
+
+
+def edges_selected():
+    # True if any object in edit mode has selected edges
+    return any(obj.data.total_edge_sel > 0 for obj in itools.get_edit_objects())
 
 
 class QuickRotateUv90Pos(bpy.types.Operator):
@@ -65,14 +65,22 @@ class SeamsFromSharps(bpy.types.Operator):
 
     def execute(self, context):
         mode = itools.get_mode()
-        selection = []
+        itools.set_mode('EDGE')
 
-        if mode in ['VERT', 'EDGE', 'FACE']:
-            bm = itools.get_bmesh()
-            itools.set_mode('EDGE')
-            selection = itools.get_selected()
+        # Whole meshes only when nothing is selected on any of them, otherwise
+        # objects without selected edges are left alone
+        has_selection = mode in ['VERT', 'EDGE', 'FACE'] and edges_selected()
+
+        for obj in itools.each_edit_object(selected_only=has_selection, isolate=False):
+            selection = []
+
+            if has_selection:
+                selection = itools.get_selected()
+                if len(selection) == 0:
+                    continue
+
+            sharp_to_seams(context, selection)
 
-        sharp_to_seams(context, selection)
         itools.set_mode(mode)
         return{'FINISHED'}
 
@@ -88,11 +96,17 @@ class UvsFromSharps(bpy.types.Operator):
         selection = []
 
         itools.set_mode('EDGE')
-        bm = itools.get_bmesh()
-        selection = itools.get_selected()
-        sharp_to_seams(context, selection)
+        has_selection = edges_selected()
+
+        for obj in itools.each_edit_object(selected_only=has_selection, isolate=False):
+            selection = itools.get_selected()
+
+            if has_selection and len(selection) == 0:
+                continue
+
+            sharp_to_seams(context, selection)
 
-        if len(selection) < 1:
+        if not has_selection:
             bpy.ops.mesh.select_all(action='SELECT')
 
         bpy.ops.uv.unwrap(method='ANGLE_BASED', margin=0.02)
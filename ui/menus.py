@@ -64,6 +64,7 @@ class VIEW3D_MT_edit_lattice_itools(bpy.types.Menu):
         layout.operator("mesh.lattice_resolution_2x2x2", text="Preset 2X2X2")
         layout.operator("mesh.lattice_resolution_3x3x3", text="Preset 3X3X3")
         layout.operator("mesh.lattice_resolution_4x4x4", text="Preset 4X4X4")
+        layout.operator("mesh.lattice_resolution_adaptive", text="Adaptive")
 
 
 class VIEW3D_MT_edit_uvs_itools(bpy.types.Menu):
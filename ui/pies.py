@@ -202,6 +202,9 @@ class VIEW3D_MT_PIE_SM_lattice(Menu):
         # 8 - TOP
         pie.operator("mesh.quick_lattice", text="Apply Lattice")
 
+        # 7 - TOP - LEFT
+        pie.operator("mesh.lattice_resolution_adaptive", text="Resolution Adaptive")
+
 
 class VIEW3D_MT_PIE_SM_curve(Menu):
     # bl_idname = "mesh.ssc_new_obj_menu"
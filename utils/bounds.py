@@ -0,0 +1,65 @@
+import bpy
+import numpy as np
+from collections import namedtuple
+from . import itools as itools
+
+# Bounding boxes over vertex coordinates read in bulk.
+# Boxes are (center, dimensions, rotation) in world space, rotation is a 3x3
+# array whose columns are the box axes, identity for axis aligned boxes.
+
+Bounds = namedtuple("Bounds", ["center", "dimensions", "rotation"])
+
+# Flat boxes get this thickness, a zero scale lattice cant be moved
+MIN_DIMENSION = 0.001
+
+
+def world_coords(obj, indexes=None):
+    # Vertex positions of obj in world space, all of them or the ones in indexes
+    coords = itools.read_mesh_attribute(obj.data.vertices, "co", np.float32, 3).astype(np.float64)
+
+    if indexes is not None:
+        coords = coords[np.asarray(indexes, dtype=np.int64)]
+
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    return coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def box(points, rotation):
+    # Tightest box around points with the axes of rotation
+    local = points @ rotation
+    minimum = local.min(axis=0)
+    maximum = local.max(axis=0)
+    dimensions = np.maximum(maximum - minimum, MIN_DIMENSION)
+    return Bounds(rotation @ ((maximum + minimum) / 2), dimensions, rotation)
+
+
+def aabb(points):
+    return box(np.asarray(points, dtype=np.float64), np.identity(3))
+
+
+def obb(points):
+    # Axes from the principal components of the points, right handed
+    points = np.asarray(points, dtype=np.float64)
+
+    if len(points) < 3:
+        return aabb(points)
+
+    centered = points - points.mean(axis=0)
+    axes = np.linalg.eigh(centered.T @ centered)[1][:, ::-1]
+
+    if np.linalg.det(axes) < 0:
+        axes[:, 2] *= -1
+
+    return box(points, axes)
+
+
+def fit(points, oriented=False):
+    # Oriented box only when it is actually tighter, PCA axes of boxy shapes are arbitrary
+    bounds = aabb(points)
+
+    if oriented:
+        oriented_bounds = obb(points)
+        if np.prod(oriented_bounds.dimensions) < np.prod(bounds.dimensions) * 0.99:
+            return oriented_bounds
+
+    return bounds
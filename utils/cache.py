@@ -0,0 +1,159 @@
+import bpy
+from bpy.app.handlers import persistent
+
+# Single invalidation authority for every itools cache.
+# Caches hold entries per object name and declare which kind of update
+# makes them stale. Handlers are only installed while some cache holds
+# entries, so there is no cost when no tool is caching anything.
+
+GEOMETRY = 'GEOMETRY'
+TRANSFORM = 'TRANSFORM'
+SELECTION = 'SELECTION'
+
+# Geometry updates also reorder/recreate elements, so selection data goes stale too
+IMPLIED_UPDATES = {GEOMETRY: {GEOMETRY, SELECTION},
+                   TRANSFORM: {TRANSFORM},
+                   SELECTION: {SELECTION}}
+
+caches = {}
+enabled = False
+handlers_installed = False
+
+
+def add_cache(name, invalidate_on=(GEOMETRY,)):
+    if name not in caches:
+        caches[name] = {"invalidate_on": set(invalidate_on), "entries": {}}
+
+
+def get(name, key, default=None):
+    if name not in caches:
+        return default
+    return caches[name]["entries"].get(key, default)
+
+
+def store(name, key, value):
+    # Nothing is kept while the addon is not registered, as nobody would invalidate it
+    if not enabled or name not in caches:
+        return
+
+    caches[name]["entries"][key] = value
+    install_handlers()
+
+
+def has_entries():
+    return any(len(cache["entries"]) > 0 for cache in caches.values())
+
+
+def invalidate(key=None, update=None, name=None):
+    # Drops entries for key (all keys if None) in caches affected by update (all if None)
+    for cache_name, cache in caches.items():
+        if name is not None and cache_name != name:
+            continue
+
+        if update is not None and cache["invalidate_on"].isdisjoint(IMPLIED_UPDATES[update]):
+            continue
+
+        if key is None:
+            cache["entries"].clear()
+        else:
+            cache["entries"].pop(key, None)
+
+
+def clear():
+    invalidate()
+
+
+def get_update_types(update):
+    update_types = []
+
+    if update.is_updated_geometry:
+        update_types.append(GEOMETRY)
+
+    if update.is_updated_transform:
+        update_types.append(TRANSFORM)
+
+    if len(update_types) == 0:
+        update_types.append(SELECTION)
+
+    return update_types
+
+
+def release_handlers():
+    # Handler lists cant be modified while Blender runs them, defer to a timer
+    if handlers_installed and not has_entries() and not bpy.app.timers.is_registered(remove_handlers):
+        bpy.app.timers.register(remove_handlers, first_interval=0.0)
+
+
+@persistent
+def depsgraph_update_post(scene, depsgraph):
+    for update in depsgraph.updates:
+        if not isinstance(update.id, bpy.types.Object):
+            continue
+
+        for update_type in get_update_types(update):
+            invalidate(update.id.name, update_type)
+
+    release_handlers()
+
+
+@persistent
+def frame_change_post(scene, *args):
+    # Frame changes dont send depsgraph updates, anything animated or deformed may be stale
+    clear()
+    release_handlers()
+
+
+@persistent
+def undo_post(scene, *args):
+    clear()
+    release_handlers()
+
+
+@persistent
+def load_post(*args):
+    clear()
+    release_handlers()
+
+
+def install_handlers():
+    global handlers_installed
+    if handlers_installed:
+        return
+
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post)
+    bpy.app.handlers.frame_change_post.append(frame_change_post)
+    bpy.app.handlers.undo_post.append(undo_post)
+    bpy.app.handlers.redo_post.append(undo_post)
+    bpy.app.handlers.load_post.append(load_post)
+    handlers_installed = True
+
+
+def remove_handlers():
+    global handlers_installed
+    # Entries may have been stored again since the removal was scheduled
+    if not handlers_installed or (enabled and has_entries()):
+        return
+
+    for handler_list, handler in ((bpy.app.handlers.depsgraph_update_post, depsgraph_update_post),
+                                  (bpy.app.handlers.frame_change_post, frame_change_post),
+                                  (bpy.app.handlers.undo_post, undo_post),
+                                  (bpy.app.handlers.redo_post, undo_post),
+                                  (bpy.app.handlers.load_post, load_post)):
+        if handler in handler_list:
+            handler_list.remove(handler)
+
+    handlers_installed = False
+
+
+def register():
+    global enabled
+    enabled = True
+
+
+def unregister():
+    global enabled
+    enabled = False
+    clear()
+    remove_handlers()
+    if bpy.app.timers.is_registered(remove_handlers):
+        bpy.app.timers.unregister(remove_handlers)
@@ -29,6 +29,7 @@ class DebugOp(bpy.types.Operator):
     def execute(self, context):
         prop = up.get_keymaps_by_key()
         print("Preference Settings : ", prop)
+        print("Mode conversions : ", itools.mode_stats)
         return {'FINISHED'}
 
 
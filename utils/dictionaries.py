@@ -9,7 +9,7 @@ def write(data_block, values, obj=""):
     if obj == "":
         obj = bpy.context.active_object
 
-    if "itools" not in bpy.context.object:
+    if "itools" not in obj:
         obj['itools'] = itools_dic
 
     obj['itools'][data_block] = values
@@ -19,7 +19,7 @@ def read(data_block, obj=""):
     if obj == "":
         obj = bpy.context.active_object
 
-    if "itools" in bpy.context.object:
+    if "itools" in obj and data_block in obj['itools']:
         return obj['itools'][data_block]
 
     else:
@@ -0,0 +1,184 @@
+import bpy
+import heapq
+import numpy as np
+from collections import deque
+from . import topology as topology
+
+# Graph searches over the cached topology index.
+# Works on the vert graph, the edge dual graph and the face dual graph,
+# without touching the selection or calling operators.
+
+
+def neighbours(topo, element, mode, face_step=False):
+    """
+    Elements connected to element in mode's graph.
+    VERT: verts sharing an edge, or a face with face_step
+    EDGE: edges sharing a vert, or a face with face_step (edge rings)
+    FACE: faces sharing an edge, or a vert with face_step
+    """
+    if mode == 'VERT':
+        if face_step:
+            connected = np.concatenate([topo.verts_of_face(face) for face in topo.faces_of_vert(element)] +
+                                       [topo.edge_verts[topo.edges_of_vert(element)].ravel()])
+        else:
+            connected = topo.edge_verts[topo.edges_of_vert(element)].ravel()
+
+    elif mode == 'EDGE':
+        if face_step:
+            connected = np.concatenate([topo.edges_of_face(face) for face in topo.faces_of_edge(element)] +
+                                       [topo.edges_of_vert(vert) for vert in topo.edge_verts[element]])
+        else:
+            connected = np.concatenate([topo.edges_of_vert(vert) for vert in topo.edge_verts[element]])
+
+    elif mode == 'FACE':
+        if face_step:
+            connected = np.concatenate([topo.faces_of_vert(vert) for vert in topo.verts_of_face(element)])
+        else:
+            connected = np.concatenate([topo.faces_of_edge(edge) for edge in topo.edges_of_face(element)])
+
+    return [int(other) for other in connected if other != element]
+
+
+def shortest_path(source, target, mode, face_step=False, weights=None, topo=None):
+    """
+    Element indexes on the shortest path from source to target, both included.
+    Unweighted searches are a BFS, passing per element weights runs Dijkstra.
+    Both stop as soon as target is reached. Returns [] if target cant be reached.
+    """
+    if topo is None:
+        topo = topology.get_topology()
+
+    if source == target:
+        return [source]
+
+    if weights is None:
+        previous = {source: None}
+        queue = deque([source])
+
+        while queue:
+            current = queue.popleft()
+
+            for other in neighbours(topo, current, mode, face_step):
+                if other in previous:
+                    continue
+
+                previous[other] = current
+
+                if other == target:
+                    return build_path(previous, target)
+
+                queue.append(other)
+
+        return []
+
+    previous = {source: None}
+    costs = {source: 0.0}
+    heap = [(0.0, source)]
+
+    while heap:
+        cost, current = heapq.heappop(heap)
+
+        if current == target:
+            return build_path(previous, target)
+
+        if cost > costs[current]:
+            continue
+
+        for other in neighbours(topo, current, mode, face_step):
+            new_cost = cost + float(weights[other])
+
+            if other not in costs or new_cost < costs[other]:
+                costs[other] = new_cost
+                previous[other] = current
+                heapq.heappush(heap, (new_cost, other))
+
+    return []
+
+
+def build_path(previous, target):
+    path = [target]
+
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+
+    path.reverse()
+    return path
+
+
+def distance(source, target, mode, face_step=False, topo=None):
+    # Number of steps between two elements, -1 if they are not connected
+    return len(shortest_path(source, target, mode, face_step, topo=topo)) - 1
+
+
+def distance_between_elements(elements, mode, ring=False, topo=None):
+    # Elements strictly between the two given ones, 0 when they are adjacent.
+    # Rings step trough faces so parallel edges count as adjacent
+    steps = distance(elements[0], elements[1], mode, face_step=ring and mode == 'EDGE', topo=topo)
+    return max(steps - 1, 0)
+
+
+def find(parent, element):
+    # Root of element, halving the path on the way
+    while parent[element] != element:
+        parent[element] = parent[parent[element]]
+        element = parent[element]
+    return element
+
+
+def label_components(indexes, mode, topo=None):
+    """
+    Connected component label for every element in indexes, using an array backed union-find.
+    Verts connect trough edges, edges trough shared verts and faces trough shared edges.
+    Labels go from 0 to the number of components - 1.
+    """
+    if topo is None:
+        topo = topology.get_topology()
+
+    indexes = np.asarray(indexes, dtype=np.int64)
+
+    # Pair every element with the elements connecting it to its neighbours
+    if mode == 'VERT':
+        size = topo.num_verts
+        members = topo.edge_verts.ravel()
+        connectors = np.repeat(np.arange(topo.num_edges, dtype=np.int64), 2)
+
+    elif mode == 'EDGE':
+        size = topo.num_edges
+        members = np.repeat(np.arange(topo.num_edges, dtype=np.int64), 2)
+        connectors = topo.edge_verts.ravel()
+
+    elif mode == 'FACE':
+        size = topo.num_faces
+        members = np.repeat(np.arange(topo.num_faces, dtype=np.int64), np.diff(topo.face_offsets))
+        connectors = topo.face_edges
+
+    local = np.full(size, -1, dtype=np.int64)
+    local[indexes] = np.arange(len(indexes))
+
+    members = local[members]
+    selected = members >= 0
+    members = members[selected]
+    connectors = connectors[selected]
+
+    # Elements sharing a connector end up next to each other once sorted
+    order = np.argsort(connectors, kind='stable')
+    members = members[order]
+    connectors = connectors[order]
+    shared = np.flatnonzero(connectors[1:] == connectors[:-1])
+
+    parent = list(range(len(indexes)))
+
+    for a, b in zip(members[shared].tolist(), members[shared + 1].tolist()):
+        root_a = find(parent, a)
+        root_b = find(parent, b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    roots = [find(parent, element) for element in range(len(indexes))]
+    return np.unique(np.asarray(roots, dtype=np.int64), return_inverse=True)[1].reshape(-1)
+
+
+def count_components(indexes, mode, topo=None):
+    if len(indexes) == 0:
+        return 0
+    return int(label_components(indexes, mode, topo).max()) + 1
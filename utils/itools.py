@@ -1,11 +1,17 @@
 import bpy
 import bmesh
-from collections import OrderedDict, Counter
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
+from . import topology as topology
+from . import cache as cache
 
 
 MAX_ITERATIONS = 400
 DOUBLECLICK_TIME = 0.1
 
+cache.add_cache("indexes", invalidate_on=(cache.GEOMETRY,))
+
 
 def list_union(a, b):
     return list(set(a) | set(b))
@@ -50,25 +56,438 @@ def get_mode():
 def set_mode(mode, grow=False):
     actual_mode = get_mode()
     if mode == 'OBJECT' and actual_mode != 'OBJECT':
+        # The edit BMesh is freed, its index tables with it
+        for session in sessions.values():
+            session.release()
+        cache.invalidate(name="indexes")
         bpy.ops.object.mode_set(mode='OBJECT')
+        mode_stats["conversions"] += 1
 
     elif mode in ['VERT', 'EDGE', 'FACE']:
         if actual_mode == 'OBJECT':
+            cache.invalidate(name="indexes")
             bpy.ops.object.mode_set(mode='EDIT')
+            mode_stats["conversions"] += 1
         bpy.ops.mesh.select_mode(type=mode, use_expand=grow)
 
 
-def get_bmesh():
+# Mesh <-> edit mesh conversions done by set_mode and the ones mode guards avoided
+mode_stats = {"conversions": 0, "elided": 0}
+
+
+def is_conversion(mode, other):
+    # Switching between object and edit mode converts the whole mesh
+    return (mode == 'OBJECT') != (other == 'OBJECT')
+
+
+class ModeGuard:
+    """
+    Collects the switches requested inside a mode_guard block and only performs the last one,
+    so pairs like OBJECT -> VERT cancel out instead of converting the mesh twice.
+    """
+
+    def __init__(self):
+        self.requested = get_mode()
+        self.requests = 0
+
+    def request(self, mode):
+        if is_conversion(self.requested, mode):
+            self.requests += 1
+        self.requested = mode
+
+    def apply(self):
+        # Performs the pending switch, for code that needs the requested mode right away
+        actual_mode = get_mode()
+        performed = 0
+
+        if self.requested != actual_mode:
+            performed = int(is_conversion(actual_mode, self.requested))
+            set_mode(self.requested)
+
+        mode_stats["elided"] += max(self.requests - performed, 0)
+        self.requests = 0
+
+
+@contextmanager
+def mode_guard():
+    guard = ModeGuard()
+    yield guard
+    guard.apply()
+
+
+def refresh_ui(context):
+    # Updates the depsgraph and redraws, what the EDIT -> OBJECT round trips were used for
+    context.view_layer.update()
+    for area in context.screen.areas:
+        area.tag_redraw()
+    mode_stats["elided"] += 2
+
+
+def get_edit_object():
+    # Object the mesh helpers work on, see each_edit_object
+    if current_object is not None:
+        return current_object
+    return bpy.context.edit_object
+
+
+def get_edit_objects():
+    # Every mesh in edit mode, the active one first
+    active = bpy.context.edit_object
+    objects = [obj for obj in bpy.context.objects_in_mode_unique_data if obj.type == 'MESH' and obj != active]
+
+    if active is not None and active.type == 'MESH':
+        objects.insert(0, active)
+
+    return objects
+
+
+def get_bmesh(obj=None):
     if get_mode() in ['VERT', 'EDGE', 'FACE']:
-        return bmesh.from_edit_mesh(bpy.context.edit_object.data)
+        if obj is None:
+            obj = get_edit_object()
+        if obj.name in sessions:
+            return sessions[obj.name].get_bmesh()
+        return bmesh.from_edit_mesh(obj.data)
     else:
         print("Must be in obj mode to get bmesh")
 
 
+class BMeshSession:
+    """
+    Edit BMesh of one object held for the length of an operator, see bmesh_session.
+    Edit mesh updates are sent once on exit, lookup tables are kept valid by update_indexes.
+    The topology index checked once is trusted for the rest of the session, see topology.get_topology.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.bm = None
+        self.topology = None
+        self.needs_update = False
+        self.destructive = False
+
+    def get_bmesh(self):
+        if self.bm is None or not self.bm.is_valid:
+            self.bm = bmesh.from_edit_mesh(self.obj.data)
+            self.topology = None
+        return self.bm
+
+    def tag_update(self, destructive=False):
+        # Geometry changes invalidate the lookup tables straight away
+        self.needs_update = True
+        self.destructive = self.destructive or destructive
+        if destructive:
+            self.topology = None
+            invalidate_indexes(self.obj)
+
+    def release(self):
+        # Sends the pending update, the BMesh is not touched after this
+        if self.needs_update and self.bm is not None and self.bm.is_valid:
+            bmesh.update_edit_mesh(self.obj.data, loop_triangles=True, destructive=self.destructive)
+        self.bm = None
+        self.topology = None
+        self.needs_update = False
+        self.destructive = False
+
+
+# Active sessions by object name, get_bmesh and update_edit_mesh go trough them
+sessions = {}
+
+# Set while each_edit_object runs, otherwise the helpers use the context edit object
+current_object = None
+
+
+@contextmanager
+def bmesh_session(obj=None):
+    """
+    Holds the edit BMesh for the duration of the block and batches edit mesh updates.
+    Nested sessions reuse the outer one.
+    """
+    if obj is None:
+        obj = get_edit_object()
+
+    if obj.name in sessions:
+        yield sessions[obj.name]
+        return
+
+    session = sessions[obj.name] = BMeshSession(obj)
+
+    try:
+        yield session
+    finally:
+        sessions.pop(obj.name, None)
+        session.release()
+
+
+def read_selection(bm):
+    # Selection of every domain plus the selection history, to be put back by write_selection or set_selection
+    return ([SelectionMask.from_bmesh(bm, mode) for mode in ['VERT', 'EDGE', 'FACE']],
+            list(bm.select_history))
+
+
+def write_selection(bm, selection=None):
+    # Replaces the selection of bm alone, select_all would touch every object in edit mode
+    for elements in (bm.faces, bm.edges, bm.verts):
+        for element in elements:
+            if element.select:
+                element.select = False
+    bm.select_history.clear()
+
+    if selection is not None:
+        set_selection(bm, selection)
+
+
+def set_selection(bm, selection, value=True):
+    """
+    Selects (or deselects) the elements of a selection from read_selection, without visiting the others.
+    Deselecting the selection bm currently has clears it as write_selection(bm) does, minus the sweeps.
+    """
+    masks, history = selection
+    for mode, mask in zip(['VERT', 'EDGE', 'FACE'], masks):
+        elements = get_elements(bm, mode)
+        mask.resized(len(elements)).apply(bm, mode, value)
+
+    if not value:
+        bm.select_history.clear()
+        return
+
+    for element in history:
+        if element.is_valid:
+            bm.select_history.add(element)
+
+
+def deselect_all(bm, obj=None):
+    # select_all is faster but works on every object in edit mode, only used when no other is selected
+    if obj is None:
+        obj = get_edit_object()
+
+    if any(other.data.total_vert_sel > 0 for other in get_edit_objects() if other != obj):
+        write_selection(bm)
+    else:
+        bpy.ops.mesh.select_all(action='DESELECT')
+
+
+def each_edit_object(selected_only=True, isolate=True):
+    """
+    Yields every mesh in edit mode with the helpers pointed at it, each in its own BMesh session,
+    so a single operator call (and undo step) works on all of them.
+    selected_only: skips objects without selection, only the active one runs if nothing is selected.
+    isolate: the other objects are deselected while one runs, so mesh operators only see that one.
+    """
+    global current_object
+
+    objects = get_edit_objects()
+
+    if len(objects) == 1:
+        with bmesh_session(objects[0]):
+            yield objects[0]
+        return
+
+    if selected_only:
+        objects = [obj for obj in objects if obj.data.total_vert_sel > 0] or objects[:1]
+
+    # Selections are put aside up front and written back at the end.
+    # Only objects with a selection are read, the rest are only written sparsely
+    stored = {}
+    if isolate:
+        for obj in get_edit_objects():
+            if obj.data.total_vert_sel > 0:
+                bm = bmesh.from_edit_mesh(obj.data)
+                stored[obj] = read_selection(bm)
+                set_selection(bm, stored[obj], False)
+
+    results = {}
+    running = None
+
+    try:
+        for obj in objects:
+            current_object = running = obj
+
+            with bmesh_session(obj):
+                if isolate and obj in stored:
+                    set_selection(get_bmesh(obj), stored[obj])
+                yield obj
+                if isolate:
+                    results[obj] = None
+                    if obj.data.total_vert_sel > 0:
+                        bm = get_bmesh(obj)
+                        results[obj] = read_selection(bm)
+                        set_selection(bm, results[obj], False)
+                        update_edit_mesh(obj, destructive=False)
+
+            running = None
+
+    finally:
+        current_object = None
+
+        for obj in set(stored) | set(results):
+            selection = results[obj] if obj in results else stored[obj]
+            if selection is None:
+                continue
+
+            # Every object is left cleared, except one an error stopped half way
+            bm = bmesh.from_edit_mesh(obj.data)
+            if obj == running:
+                write_selection(bm, selection)
+            else:
+                set_selection(bm, selection)
+            update_edit_mesh(obj, destructive=False)
+
+
+def update_edit_mesh(obj=None, destructive=True):
+    # Deferred to the end of the session when one is active
+    if obj is None:
+        obj = get_edit_object()
+
+    if obj.name in sessions:
+        sessions[obj.name].tag_update(destructive)
+    else:
+        invalidate_indexes(obj)
+        bmesh.update_edit_mesh(obj.data, loop_triangles=True, destructive=destructive)
+
+
 def to_index(items):
     return [element.index for element in items]
 
 
+def get_elements(bm, mode):
+    if mode == 'VERT':
+        return bm.verts
+    elif mode == 'EDGE':
+        return bm.edges
+    elif mode == 'FACE':
+        return bm.faces
+
+
+class SelectionMask:
+    """
+    Selection of one element domain stored as a NumPy bool array, one entry per element.
+    Set operations and membership tests are constant time per element instead of list scans.
+    """
+
+    def __init__(self, mask):
+        self.mask = np.asarray(mask, dtype=bool)
+
+    @classmethod
+    def from_indexes(cls, indexes, size):
+        # Indexes outside of the domain are dropped
+        indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+        mask = np.zeros(size, dtype=bool)
+        mask[indexes[(indexes >= 0) & (indexes < size)]] = True
+        return cls(mask)
+
+    @classmethod
+    def from_bmesh(cls, bm, mode):
+        # Element by element, BMesh has no bulk access. Mesh data outside edit mode
+        # is read in one buffer copy by get_mesh_selection instead
+        elements = get_elements(bm, mode)
+        return cls(np.fromiter((element.select for element in elements), dtype=bool, count=len(elements)))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.mask))
+
+    def __contains__(self, index):
+        return 0 <= index < len(self.mask) and bool(self.mask[index])
+
+    def resized(self, size):
+        # Same selection over a domain of a different size
+        mask = np.zeros(size, dtype=bool)
+        count = min(size, len(self.mask))
+        mask[:count] = self.mask[:count]
+        return SelectionMask(mask)
+
+    def union(self, other):
+        other = other.resized(len(self.mask))
+        return SelectionMask(self.mask | other.mask)
+
+    def intersection(self, other):
+        other = other.resized(len(self.mask))
+        return SelectionMask(self.mask & other.mask)
+
+    def difference(self, other):
+        other = other.resized(len(self.mask))
+        return SelectionMask(self.mask & ~other.mask)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def indexes(self):
+        return np.flatnonzero(self.mask)
+
+    def pack(self):
+        # One bit per element as int32 words, the smallest array an ID property can hold
+        bits = np.packbits(self.mask)
+        return np.pad(bits, (0, -len(bits) % 4)).view(np.int32)
+
+    @classmethod
+    def unpack(cls, words, size):
+        bits = np.asarray(words, dtype=np.int32).view(np.uint8)
+        return cls(np.unpackbits(bits, count=size).astype(bool))
+
+    def apply(self, bm, mode, value=True):
+        # Sets the select state of every element in the mask, one element at a time.
+        # The bulk write is set_mesh_selection, for Mesh data outside edit mode
+        elements = get_elements(bm, mode)
+        elements.ensure_lookup_table()
+        for index in self.indexes().tolist():
+            elements[index].select = value
+
+
+def get_mesh_elements(mesh, mode):
+    if mode == 'VERT':
+        return mesh.vertices
+    elif mode == 'EDGE':
+        return mesh.edges
+    elif mode == 'FACE':
+        return mesh.polygons
+
+
+def read_mesh_attribute(elements, attribute, dtype, width=1):
+    # One buffer copy trough foreach_get
+    values = np.empty(len(elements) * width, dtype=dtype)
+    elements.foreach_get(attribute, values)
+    return values.reshape(-1, width) if width > 1 else values
+
+
+# Selection I/O for Mesh data, only valid while the object is not in edit mode
+def get_mesh_selection(mesh, mode):
+    return SelectionMask(read_mesh_attribute(get_mesh_elements(mesh, mode), "select", bool))
+
+
+def set_mesh_selection(mesh, mode, selection):
+    # Writes selection for mode and flushes it to the other domains in bulk.
+    # Index properties are int32, any other dtype makes foreach_get copy item by item
+    edge_verts = read_mesh_attribute(mesh.edges, "vertices", np.int32, 2)
+    loop_verts = read_mesh_attribute(mesh.loops, "vertex_index", np.int32)
+    loop_edges = read_mesh_attribute(mesh.loops, "edge_index", np.int32)
+    loop_starts = read_mesh_attribute(mesh.polygons, "loop_start", np.int32)
+
+    if mode == 'VERT':
+        verts = selection.resized(len(mesh.vertices)).mask
+        edges = verts[edge_verts].all(axis=1)
+        faces = np.logical_and.reduceat(verts[loop_verts], loop_starts) if len(loop_starts) else np.zeros(0, bool)
+
+    elif mode == 'EDGE':
+        edges = selection.resized(len(mesh.edges)).mask
+        verts = np.zeros(len(mesh.vertices), dtype=bool)
+        verts[edge_verts[edges].ravel()] = True
+        faces = np.logical_and.reduceat(edges[loop_edges], loop_starts) if len(loop_starts) else np.zeros(0, bool)
+
+    elif mode == 'FACE':
+        faces = selection.resized(len(mesh.polygons)).mask
+        loop_faces = np.repeat(faces, read_mesh_attribute(mesh.polygons, "loop_total", np.int32))
+        verts = np.zeros(len(mesh.vertices), dtype=bool)
+        verts[loop_verts[loop_faces]] = True
+        edges = np.zeros(len(mesh.edges), dtype=bool)
+        edges[loop_edges[loop_faces]] = True
+
+    mesh.vertices.foreach_set("select", verts)
+    mesh.edges.foreach_set("select", edges)
+    mesh.polygons.foreach_set("select", faces)
+    mesh.update()
+
+
 # Return item or index for selected mesh elements or names for objects
 # Add selection order by using print([a.index for a in bm.select_history])
 def get_selected(mode='', item=True, ordered=False, all=False):
@@ -166,7 +585,7 @@ def select(target, mode='', item=True, replace=False, deselect=False, add_to_his
     if not mode:
         mode = get_mode()
 
-    if safe_mode:
+    if safe_mode and mode == 'EDIT_CURVE':
         existing_items = get_selected(mode=mode, item=item, all=True)
 
     selection_value = True
@@ -174,6 +593,9 @@ def select(target, mode='', item=True, replace=False, deselect=False, add_to_his
     if deselect:
         selection_value = False
 
+    if isinstance(target, np.ndarray):
+        target = target.tolist()
+
     if type(target) != list:
         target = [target]
 
@@ -193,51 +615,22 @@ def select(target, mode='', item=True, replace=False, deselect=False, add_to_his
         bm = get_bmesh()
 
         if replace:
-            bpy.ops.mesh.select_all(action='DESELECT')
+            deselect_all(bm)
 
         if item:
+            # Elements may come straight from bmesh.ops, with indexes not assigned yet
+            update_indexes(mode, bm)
             target = [item.index for item in target]
 
-        if safe_mode:
-            if mode == 'VERT':
-                for vert in target:
-                    if vert in existing_items:
-                        bm.verts[vert].select = selection_value
-                        if add_to_history:
-                            bm.select_history.add(bm.verts[vert])
+        # Indexes missing from the mesh are skipped, which is all safe_mode needs
+        elements = get_elements(bm, mode)
+        selection = SelectionMask.from_indexes(target, len(elements))
+        selection.apply(bm, mode, selection_value)
 
-            elif mode == 'EDGE':
-                for edge in target:
-                    if edge in existing_items:
-                        bm.edges[edge].select = selection_value
-                        if add_to_history:
-                            bm.select_history.add(bm.edges[edge])
-
-            elif mode == 'FACE':
-                for face in target:
-                    if face in existing_items:
-                        bm.faces[face].select = selection_value
-                        if add_to_history:
-                            bm.select_history.add(bm.faces[face])
-
-        else:
-            if mode == 'VERT':
-                for vert in target:
-                    bm.verts[vert].select = selection_value
-                    if add_to_history:
-                        bm.select_history.add(bm.verts[vert])
-
-            elif mode == 'EDGE':
-                for edge in target:
-                    bm.edges[edge].select = selection_value
-                    if add_to_history:
-                        bm.select_history.add(bm.edges[edge])
-
-            elif mode == 'FACE':
-                for face in target:
-                    bm.faces[face].select = selection_value
-                    if add_to_history:
-                        bm.select_history.add(bm.faces[face])
+        if add_to_history:
+            for index in target:
+                if index in selection:
+                    bm.select_history.add(elements[index])
 
     elif mode == 'EDIT_CURVE':
         print("Curve")
@@ -262,65 +655,65 @@ def select(target, mode='', item=True, replace=False, deselect=False, add_to_his
                         point.select = True
 
 
-def convert_selection(selection, to):
-    mode = get_mode()
-
-    if mode == 'VERT':
-        if to == 'EDGE':
-            new_selection = [edge for vert in selection
-                             for edge in vert.link_edges]
-
-        elif to == 'FACE':
-            new_selection = [face for vert in selection
-                             for face in vert.link_faces]
-
-        new_selection = [item for item, count
-                         in Counter(new_selection).items()
-                         if count > 1]
+def convert_selection(selection, to, mode='', contained=None):
+    """
+    Converts a selection of elements or indexes to another element type trough the topology index.
+    Returns BMesh elements for elements and an index array for indexes, see topology.convert.
+    """
+    if not mode:
+        mode = get_mode()
 
-    elif mode == 'EDGE':
-        if to == 'VERT':
-            new_selection = [vert for edge in selection
-                             for vert in edge.verts]
+    items = len(selection) > 0 and not isinstance(selection[0], (int, np.integer))
+    indexes = to_index(selection) if items else selection
 
-        elif to == 'FACE':
-            new_selection = [face for edge in selection
-                             for face in edge.link_faces]
+    topo = topology.get_topology()
+    new_selection = np.flatnonzero(topology.convert(topo, indexes, mode, to, contained))
 
-    elif mode == 'FACE':
-        if to == 'VERT':
-            new_selection = [vert for face in selection
-                             for vert in face.verts]
+    if items:
+        elements = get_elements(get_bmesh(), to)
+        elements.ensure_lookup_table()
+        return [elements[index] for index in new_selection.tolist()]
 
-        elif to == 'EDGE':
-            new_selection = [edge for face in selection
-                             for edge in face.edges]
+    return new_selection
 
-    new_selection = remove_duplicates(new_selection)
 
-    return new_selection
+def update_indexes(mode='', bm=None, obj=None):
+    """
+    Makes the indexes and lookup tables of mode ('VERT', 'EDGE', 'FACE' or 'ALL') valid.
+    Every table is stamped with the BMesh and its element count and only rebuilt when stale,
+    geometry updates and mode switches drop the stamps. Never updates the edit mesh.
+    Stamps hold the BMesh itself, an id() could be handed to a new BMesh once the old one is freed.
+    """
+    if obj is None:
+        obj = get_edit_object()
 
+    if bm is None:
+        bm = get_bmesh(obj)
 
-def update_indexes(mode=''):
-    bm = get_bmesh()
     if not mode:
-        print("Try to get mode")
         mode = get_mode()
-        print(mode)
 
-    if 'VERT' or 'ALL' in mode:
-        bm.verts.index_update()
-        bm.verts.ensure_lookup_table()
+    modes = [mode] if mode in ['VERT', 'EDGE', 'FACE'] else ['VERT', 'EDGE', 'FACE']
+    stamps = cache.get("indexes", obj.name, {})
+
+    for mode in modes:
+        elements = get_elements(bm, mode)
+        stamped_bm, count = stamps.get(mode, (None, 0))
+
+        if stamped_bm is not bm or count != len(elements):
+            elements.index_update()
+            elements.ensure_lookup_table()
+            stamps[mode] = (bm, len(elements))
 
-    if 'EDGE' or 'ALL' in mode:
-        bm.edges.index_update()
-        bm.edges.ensure_lookup_table()
+    cache.store("indexes", obj.name, stamps)
+    return bm
 
-    if 'FACE' or 'ALL' in mode:
-        bm.faces.index_update()
-        bm.faces.ensure_lookup_table()
 
-    bmesh.update_edit_mesh(bpy.context.edit_object.data)
+def invalidate_indexes(obj=None):
+    # Forces the next update_indexes to rebuild, for edits that keep the element counts
+    if obj is None:
+        obj = get_edit_object()
+    cache.invalidate(obj.name, name="indexes")
 
 
 def remove_duplicates(target):
@@ -0,0 +1,295 @@
+import bpy
+from . import itools as itools
+
+# Native loop walkers, they read topology straight from the BMesh and never
+# touch the selection or the operator stack.
+# Loops are returned as (elements, cyclic) with elements ordered along the loop.
+
+
+def opposite_edge(face, edge):
+    # Edge across a quad, None for tris and ngons
+    if len(face.loops) != 4:
+        return None
+
+    for loop in face.loops:
+        if loop.edge == edge:
+            return loop.link_loop_next.link_loop_next.edge
+
+
+def next_loop_edge(edge, vert):
+    # Edge continuing the loop of edge past vert, None where the loop ends
+    if edge.is_boundary:
+        candidates = [other for other in vert.link_edges if other != edge and other.is_boundary]
+        return candidates[0] if len(candidates) == 1 else None
+
+    if len(vert.link_edges) != 4 or not edge.is_manifold:
+        return None
+
+    # Quad loop traversal: take the loop of edge that ends on vert and step
+    # over the perpendicular edge into the next face
+    loop = edge.link_loops[0]
+    if loop.vert == vert:
+        loop = loop.link_loop_radial_next
+
+    if loop.vert != vert:
+        candidate = loop.link_loop_next.link_loop_radial_next.link_loop_next.edge
+        if vert in candidate.verts and not any(face in edge.link_faces for face in candidate.link_faces):
+            return candidate
+
+    # Inconsistent winding, fall back to the edge that shares no face with the current one
+    candidates = [other for other in vert.link_edges
+                  if other != edge and not any(face in edge.link_faces for face in other.link_faces)]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def walk_edges(edge, vert):
+    # Edges after edge heading trough vert, flags if the walk came back to edge
+    edges = []
+    visited = {edge}
+    current = edge
+
+    while True:
+        next_edge = next_loop_edge(current, vert)
+
+        if next_edge is None:
+            return edges, False
+
+        if next_edge == edge:
+            return edges, True
+
+        if next_edge in visited:
+            return edges, False
+
+        visited.add(next_edge)
+        edges.append(next_edge)
+        vert = next_edge.other_vert(vert)
+        current = next_edge
+
+
+def edge_loop(edge):
+    forward, cyclic = walk_edges(edge, edge.verts[1])
+
+    if cyclic:
+        return [edge] + forward, True
+
+    backward, _ = walk_edges(edge, edge.verts[0])
+    return list(reversed(backward)) + [edge] + forward, False
+
+
+def walk_ring(edge, face):
+    # Edges after edge crossing face, flags if the walk came back to edge
+    edges = []
+    visited = {edge}
+    current = edge
+
+    while True:
+        next_edge = opposite_edge(face, current)
+
+        # Tris and ngons end the ring
+        if next_edge is None:
+            return edges, False
+
+        if next_edge == edge:
+            return edges, True
+
+        if next_edge in visited:
+            return edges, False
+
+        visited.add(next_edge)
+        edges.append(next_edge)
+
+        # Boundary and non manifold edges end the ring too
+        next_faces = [other for other in next_edge.link_faces if other != face]
+        if len(next_faces) != 1:
+            return edges, False
+
+        face = next_faces[0]
+        current = next_edge
+
+
+def edge_ring(edge):
+    faces = list(edge.link_faces)
+
+    if len(faces) == 0:
+        return [edge], False
+
+    forward, cyclic = walk_ring(edge, faces[0])
+
+    if cyclic:
+        return [edge] + forward, True
+
+    backward = []
+    if len(faces) == 2:
+        backward, _ = walk_ring(edge, faces[1])
+
+    return list(reversed(backward)) + [edge] + forward, False
+
+
+def ring_verts(edges, cyclic):
+    # Verts of an ordered edge ring, two per rung, with the sides lined up:
+    # the first vert of every rung is joined to the first vert of the rung before
+    verts = list(edges[0].verts)
+
+    for edge in edges[1:]:
+        first, second = edge.verts
+        if any(other.other_vert(verts[-2]) == second for other in verts[-2].link_edges):
+            first, second = second, first
+        verts += [first, second]
+
+    return verts, cyclic
+
+
+def loop_verts(edges, cyclic):
+    # Verts of an ordered edge loop, in order
+    if len(edges) == 1:
+        return list(edges[0].verts), False
+
+    first, second = edges[0], edges[1]
+    vert = first.verts[0] if first.verts[0] not in second.verts else first.verts[1]
+    verts = [vert]
+
+    for edge in edges:
+        vert = edge.other_vert(vert)
+        verts.append(vert)
+
+    if cyclic:
+        verts.pop()
+
+    return verts, cyclic
+
+
+def face_loop(face, edge):
+    # Faces in the strip running trough edge and its opposite edge
+    forward, cyclic = face_walk(face, edge)
+
+    if cyclic:
+        return [face] + forward, True
+
+    backward, _ = face_walk(face, opposite_edge(face, edge))
+    return list(reversed(backward)) + [face] + forward, False
+
+
+def face_walk(face, edge):
+    faces = []
+    start = face
+    visited = {face}
+
+    while edge is not None and edge.is_manifold:
+        next_face = [other for other in edge.link_faces if other != face][0]
+
+        if next_face == start:
+            return faces, True
+
+        if next_face in visited:
+            return faces, False
+
+        visited.add(next_face)
+        faces.append(next_face)
+        edge = opposite_edge(next_face, edge)
+        face = next_face
+
+    return faces, False
+
+
+def element_loops(element, mode, ring=False):
+    # Every loop (or ring) trough element as (elements, cyclic)
+    if mode == 'EDGE':
+        return [edge_ring(element) if ring else edge_loop(element)]
+
+    elif mode == 'VERT':
+        loops = []
+        walked = set()
+
+        for edge in element.link_edges:
+            if edge in walked:
+                continue
+
+            if ring:
+                edges, cyclic = edge_ring(edge)
+                loops.append(ring_verts(edges, cyclic))
+            else:
+                edges, cyclic = edge_loop(edge)
+                loops.append(loop_verts(edges, cyclic))
+
+            walked.update(edges)
+
+        return loops if len(loops) > 0 else [([element], False)]
+
+    elif mode == 'FACE':
+        # Face loops and face rings are the same strips of quads
+        if len(element.loops) != 4:
+            return [([element], False)]
+
+        return [face_loop(element, element.loops[0].edge),
+                face_loop(element, element.loops[1].edge)]
+
+
+def partition_by_loop(indexes, mode, ring=False, bm=None):
+    """
+    Splits element indexes into the loops (or rings) they lie on in a single pass.
+    Returns a list of (members, loop, cyclic), members ordered along the loop.
+    Elements on two loops go with the loop holding more of the selection, ties go to
+    the first loop element_loops returns, for faces the strip trough their first edge.
+    """
+    if bm is None:
+        bm = itools.get_bmesh()
+
+    elements = itools.get_elements(bm, mode)
+    elements.ensure_lookup_table()
+    remaining = set(indexes)
+    partition = []
+
+    for index in indexes:
+        if index not in remaining:
+            continue
+
+        loops = [([element.index for element in loop], cyclic)
+                 for loop, cyclic in element_loops(elements[index], mode, ring)]
+        loop, cyclic = max(loops, key=lambda item: len(remaining.intersection(item[0])))
+
+        members = [element for element in itools.list_reduce_ordered(loop) if element in remaining]
+        remaining.difference_update(members)
+        partition.append((members, loop, cyclic))
+
+    return partition
+
+
+def step_fill(loop, members, stride, cyclic, width=1):
+    """
+    Every stride-th element of an ordered loop, lined up with the selected members.
+    Open loops are filled towards both ends, cyclic loops for one lap, stopping
+    before the lap closes closer than stride to the start.
+    Width groups that many consecutive elements into one step, vert rings step
+    rung by rung with a width of 2, filling the sides the members are on.
+    """
+    members = set(members)
+    positions = [position for position, element in enumerate(loop) if element in members]
+    anchor = min(positions) // width
+    sides = sorted(set(position % width for position in positions))
+    steps = len(loop) // width
+
+    if cyclic:
+        picked = [(anchor + offset) % steps for offset in range(0, steps - stride + 1, stride)]
+    else:
+        picked = range(anchor % stride, steps, stride)
+
+    return [loop[step * width + side] for step in picked for side in sides]
+
+
+def segment(loop, members, cyclic, width=1):
+    """
+    Elements of an ordered loop from the first member to the last one, both included.
+    Cyclic loops go the shorter way round. Width works as in step_fill.
+    """
+    members = set(members)
+    positions = [position for position, element in enumerate(loop) if element in members]
+    first, last = positions[0] // width, positions[-1] // width
+    sides = sorted(set(position % width for position in positions))
+    steps = len(loop) // width
+
+    if cyclic and last - first > steps - (last - first):
+        picked = [(last + offset) % steps for offset in range(steps - (last - first) + 1)]
+    else:
+        picked = range(first, last + 1)
+
+    return [loop[step * width + side] for step in picked for side in sides]
@@ -1,30 +1,38 @@
 import bpy
 import bmesh
+import numpy as np
+from collections import namedtuple
 from functools import reduce
 from . import itools as itools
+from . import topology as topology
+from . import graph as graph
 
 # Shared Mesh utilities and operations
 
+# Facts about an edge selection, computed together by classify_edge_selection
+EdgeSelection = namedtuple("EdgeSelection", ["border", "partial_border", "ring", "adjacent"])
+
+# Size of the spatial hash cells, in object space
+SPATIAL_HASH_PRECISION = 1e-4
+
 
 def verts_share_edge(verts):
     if len(verts) == 2:
-        return len(itools.list_intersection(verts[0].link_edges,
-                   verts[1].link_edges)) == 1
+        topo = topology.get_topology()
+        return len(np.intersect1d(topo.edges_of_vert(verts[0].index),
+                                  topo.edges_of_vert(verts[1].index))) == 1
 
     else:
         return False
 
 
-# Aproximation, might not work all the times. Will replace later
 def verts_share_face(verts):
-    face_list = []
-    for vert in verts:
-        face_list.append(vert.link_faces)
-    face_list = reduce(lambda x, y: itools.list_intersection(x, y), face_list)
-    if len(face_list) > 0:
-        return True
-    else:
+    topo = topology.get_topology()
+    face_list = [topo.faces_of_vert(vert) for vert in topology.to_index_array(verts)]
+    if len(face_list) == 0:
         return False
+    face_list = reduce(np.intersect1d, face_list)
+    return len(face_list) > 0
 
 
 def is_corner_vert(vert):
@@ -32,27 +40,30 @@ def is_corner_vert(vert):
 
 
 def is_border_vert(vert):
-    return len([edge for edge in vert.link_edges if len(edge.link_faces) == 1]) > 1
+    return bool(topology.get_topology().border_verts[vert.index])
 
 
 def are_border_verts(verts):
-    return all(is_border_vert(vert) for vert in verts)
+    return bool(topology.get_topology().border_verts[topology.to_index_array(verts)].all())
 
 
 def is_border_edge(edge):
-    return all(is_border_vert(vert) for vert in edge.verts)
+    return bool(topology.get_topology().border_edges[edge.index])
 
 
 def is_border(selection):
     # every edge must be adjacent with two other edges, if its a closed
     # border the number of adjacent edges should be at least 2 X number edges
-    adjacent_edges = [neightbour for edge in selection for verts in edge.verts
-                      for neightbour in verts.link_edges if neightbour in selection and neightbour != edge]
-    return (all(is_border_edge(edge) for edge in selection) and len(adjacent_edges) >= len(selection) * 2)
+    topo = topology.get_topology()
+    edges = topology.to_index_array(selection)
+    # Selected edges on each vert, every edge sees the others on both of its verts
+    selected_per_vert = np.bincount(topo.edge_verts[edges].ravel(), minlength=topo.num_verts)
+    adjacent_edges = (selected_per_vert[topo.edge_verts[edges]] - 1).sum()
+    return bool(topo.border_edges[edges].all()) and bool(adjacent_edges >= len(edges) * 2)
 
 
 def is_partial_border(selection):
-    return (all(is_border_edge(edge) for edge in selection))
+    return bool(topology.get_topology().border_edges[topology.to_index_array(selection)].all())
 
 
 def is_adjacent(selection, mode):
@@ -71,41 +82,129 @@ def is_adjacent(selection, mode):
 
 
 def organize_faces_by_continuity(selection):
-        groups = []
-        ordered_groups = []
-        temp = []
+    # Groups of face indexes connected trough shared edges
+    faces = topology.to_index_array(selection)
+    if len(faces) == 0:
+        return []
 
-        for face in selection:
-                adjacent_faces = []
-                adjacent_faces = [face2.index for edge in face.edges
-                                  for face2 in edge.link_faces
-                                  if face2 in selection]
-                adjacent_faces.append(face.index)
-                adjacent_faces = list(set(adjacent_faces))
-                groups.append(adjacent_faces)
+    labels = graph.label_components(faces, 'FACE')
+    return [faces[labels == label].tolist() for label in range(labels.max() + 1)]
 
-        while len(groups) > 0:
-                temp = groups[0]
-                for group in groups[1:]:
-                        intersection = itools.list_intersection(temp, group)
-                        if len(intersection) > 0:
-                                temp = itools.list_union(temp, group)
 
-                ordered_groups.append(temp)
+def ring_edges(topo, selected):
+    """
+    Mask of selected edges that face another selected edge across one of their faces.
+    Only edges sharing no vert count, so corners like I_ or _I are not rings.
+    """
+    if topo.num_faces == 0:
+        return np.zeros(topo.num_edges, dtype=bool)
+
+    sizes = np.diff(topo.face_offsets)
+    starts = np.repeat(topo.face_offsets[:-1], sizes)
+    sizes = np.repeat(sizes, sizes)
+    corners = np.arange(len(topo.face_edges))
+    previous_corners = starts + (corners - starts - 1) % sizes
+    next_corners = starts + (corners - starts + 1) % sizes
 
-                groups = [group for group in groups
-                          if not any(element in temp
-                                     for element in group)]
+    selected_corners = selected[topo.face_edges]
+    face_count = np.repeat(topo.per_face_count(selected), np.diff(topo.face_offsets))
 
-        return ordered_groups
+    # Selected edges left in the face once the corner and its two neighbours are removed
+    opposite_count = (face_count - selected_corners - selected_corners[previous_corners] -
+                      selected_corners[next_corners])
+
+    facing = np.zeros(topo.num_edges, dtype=bool)
+    facing[topo.face_edges[selected_corners & (opposite_count > 0)]] = True
+    return facing
 
 
 def is_ring(selection):
+    topo = topology.get_topology()
+    edges = topology.to_index_array(selection)
+    selected = topology.to_mask(edges, topo.num_edges)
+    return bool(ring_edges(topo, selected)[edges].all())
+
+
+def classify_edge_selection(selection):
     """
-    # Aproximation that should work 98% for now
-    # Gets false positives when corners are selected like this: I_ or _I
+    Border, partial border, ring and adjacency of an edge selection in a single pass.
+    Same results as is_border, is_partial_border, is_ring and is_adjacent.
     """
-    neightbour_numbers = [edge for edge in selection
-                          if len([face for face in edge.link_faces if any(edge2 for edge2 in face.edges
-                                  if edge2 in selection and edge2 != edge)]) > 0]
-    return len(neightbour_numbers) == len(selection)
+    topo = topology.get_topology()
+    edges = topology.to_index_array(selection)
+    selected = topology.to_mask(edges, topo.num_edges)
+    edge_verts = topo.edge_verts[edges]
+
+    selected_per_vert = np.bincount(edge_verts.ravel(), minlength=topo.num_verts)
+    adjacent_edges = (selected_per_vert[edge_verts] - 1).sum()
+
+    partial_border = bool(topo.border_edges[edges].all())
+    border = partial_border and bool(adjacent_edges >= len(edges) * 2)
+    ring = bool(ring_edges(topo, selected)[edges].all())
+    # A single vert shared by every selected edge
+    adjacent = int((selected_per_vert == len(edges)).sum()) == 1
+
+    return EdgeSelection(border, partial_border, ring, adjacent)
+
+
+def mesh_arrays(bm=None, mesh=None, obj=None):
+    # Vertex coordinates, edge verts and face corners from a BMesh or, outside edit mode, Mesh data
+    if mesh is not None:
+        coords = itools.read_mesh_attribute(mesh.vertices, "co", np.float32, 3).astype(np.float64)
+        # Read as the int32 they are stored as, then widened like the topology index arrays
+        edge_verts = itools.read_mesh_attribute(mesh.edges, "vertices", np.int32, 2).astype(np.int64)
+        face_offsets = np.zeros(len(mesh.polygons) + 1, dtype=np.int64)
+        np.cumsum(itools.read_mesh_attribute(mesh.polygons, "loop_total", np.int32), out=face_offsets[1:])
+        face_verts = itools.read_mesh_attribute(mesh.loops, "vertex_index", np.int32).astype(np.int64)
+        return coords, edge_verts, face_offsets, face_verts
+
+    topo = topology.get_topology(bm, obj)
+    coords = np.fromiter((axis for vert in bm.verts for axis in vert.co),
+                         dtype=np.float64, count=len(bm.verts) * 3).reshape(-1, 3)
+    return coords, topo.edge_verts, topo.face_offsets, topo.face_verts
+
+
+def element_centers(mode, bm=None, mesh=None, obj=None, indexes=None):
+    # Vert positions, edge midpoints or face centers (mean of the verts).
+    # With indexes only those elements are read, not the whole mesh
+    if indexes is not None:
+        return centers_of(mode, indexes, bm, mesh)
+
+    coords, edge_verts, face_offsets, face_verts = mesh_arrays(bm, mesh, obj)
+
+    if mode == 'VERT':
+        return coords
+    elif mode == 'EDGE':
+        return coords[edge_verts].mean(axis=1)
+    elif mode == 'FACE':
+        sizes = np.diff(face_offsets)
+        rows = np.repeat(np.arange(len(sizes)), sizes)
+        centers = np.zeros((len(sizes), 3))
+        np.add.at(centers, rows, coords[face_verts])
+        return centers / np.maximum(sizes, 1)[:, None]
+
+
+def centers_of(mode, indexes, bm=None, mesh=None):
+    # Element by element, meant for a handful of elements.
+    # Summed like element_centers so both give the same values
+    if mesh is not None:
+        elements = itools.get_mesh_elements(mesh, mode)
+        verts = [[index] if mode == 'VERT' else list(elements[index].vertices) for index in indexes]
+        corners = [tuple(mesh.vertices[vert].co) for element_verts in verts for vert in element_verts]
+    else:
+        elements = itools.get_elements(bm, mode)
+        elements.ensure_lookup_table()
+        verts = [[elements[index]] if mode == 'VERT' else list(elements[index].verts) for index in indexes]
+        corners = [tuple(vert.co) for element_verts in verts for vert in element_verts]
+
+    sizes = np.array([len(element_verts) for element_verts in verts], dtype=np.int64)
+    centers = np.zeros((len(sizes), 3))
+    np.add.at(centers, np.repeat(np.arange(len(sizes)), sizes), np.array(corners, dtype=np.float64).reshape(-1, 3))
+    return centers / np.maximum(sizes, 1)[:, None]
+
+
+def spatial_hash(positions, precision=SPATIAL_HASH_PRECISION):
+    # One int32 key per position, positions within the same cell share their key
+    cells = np.floor(np.asarray(positions) / precision + 0.5).astype(np.int64)
+    keys = (cells[:, 0] * 73856093) ^ (cells[:, 1] * 19349663) ^ (cells[:, 2] * 83492791)
+    return (keys & 0x7FFFFFFF).astype(np.int32)
@@ -0,0 +1,117 @@
+import bpy
+import numpy as np
+from collections import namedtuple
+from mathutils.bvhtree import BVHTree
+from . import cache as cache
+
+# Scene ray casts against cached BVH trees.
+# Trees are built in object space from the evaluated mesh, once per mesh, and
+# dropped by the cache handlers when the geometry changes or the frame does.
+# Moving an object only changes its matrix, so transforms never rebuild a tree.
+# Instances are prefiltered with their world space bounding boxes, only the boxes
+# the ray enters are cast against, nearest first.
+
+RayHit = namedtuple("RayHit", ["object", "location", "normal", "distance"])
+
+cache.add_cache("bvh", invalidate_on=(cache.GEOMETRY,))
+
+
+def get_bvh(obj, depsgraph):
+    # Trees by object name, then by evaluated mesh. Geometry instances are temporary
+    # objects named after their instancer, each with a mesh of its own
+    trees = cache.get("bvh", obj.name)
+
+    if trees is None:
+        trees = {}
+        cache.store("bvh", obj.name, trees)
+
+    key = obj.data.as_pointer()
+
+    if key not in trees:
+        trees[key] = BVHTree.FromObject(obj, depsgraph)
+
+    return trees[key]
+
+
+def is_selected(instance):
+    # Instances follow the object that instances them
+    if instance.is_instance:
+        return instance.parent.original.select_get()
+    return instance.object.original.select_get()
+
+
+def get_instances(depsgraph, ignore_selected=True):
+    # (object, world matrix) for every mesh instance the ray can hit
+    instances = []
+
+    for instance in depsgraph.object_instances:
+        if instance.object.type != 'MESH':
+            continue
+
+        if ignore_selected and is_selected(instance):
+            continue
+
+        instances.append((instance.object, instance.matrix_world.copy()))
+
+    return instances
+
+
+def world_bounds(instances):
+    # World space AABB of every instance from its object space bounding box
+    corners = np.array([obj.bound_box for obj, matrix in instances], dtype=np.float64)
+    matrices = np.array([matrix for obj, matrix in instances], dtype=np.float64)
+    world = np.einsum('nij,nkj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    return world.min(axis=1), world.max(axis=1)
+
+
+def ray_entry(origin, direction, minimum, maximum):
+    # Distance at which the ray enters every box, inf where it misses (slab test).
+    # Axes the ray runs parallel to divide by 0 and give infinite slabs when the origin is inside
+    origin = np.asarray(origin, dtype=np.float64)
+    direction = np.asarray(direction, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first = (minimum - origin) / direction
+        second = (maximum - origin) / direction
+
+    entry = np.maximum(np.fmin(first, second).max(axis=1), 0.0)
+    exit = np.fmax(first, second).min(axis=1)
+    return np.where(entry <= exit, entry, np.inf)
+
+
+def ray_cast(context, origin, direction, ignore_selected=True):
+    """
+    Nearest hit of the ray in the scene, None if nothing is hit.
+    Selected objects are skipped before any work is done for them.
+    """
+    depsgraph = context.evaluated_depsgraph_get()
+    instances = get_instances(depsgraph, ignore_selected)
+
+    if len(instances) == 0:
+        return None
+
+    direction = direction.normalized()
+    entry = ray_entry(origin, direction, *world_bounds(instances))
+    hit = None
+
+    for index in np.argsort(entry).tolist():
+        # Boxes are sorted by entry, none of the rest can be closer than the hit
+        if entry[index] == np.inf or (hit is not None and entry[index] > hit.distance):
+            break
+
+        obj, matrix = instances[index]
+        inverse = matrix.inverted()
+        location, normal, face, distance = get_bvh(obj, depsgraph).ray_cast(
+            inverse @ origin, (inverse.to_3x3() @ direction).normalized())
+
+        if location is None:
+            continue
+
+        location = matrix @ location
+        distance = (location - origin).length
+
+        if hit is None or distance < hit.distance:
+            normal = (inverse.transposed().to_3x3() @ normal).normalized()
+            hit = RayHit(obj.original, location, normal, distance)
+
+    return hit
@@ -0,0 +1,215 @@
+import bpy
+import numpy as np
+from . import itools as itools
+from . import cache as cache
+
+# Shared topology index for edit meshes.
+# Adjacency is stored as CSR arrays (offsets + flat indices) so the mesh
+# utilities can query neighbours with NumPy instead of walking BMesh wrappers.
+# An index is built once per object and reused until its topology changes.
+
+FINGERPRINT_SAMPLES = 64
+
+cache.add_cache("topology", invalidate_on=(cache.GEOMETRY,))
+
+
+def build_csr(keys, values, size):
+    # Group values by key, row i holds values[offsets[i]:offsets[i + 1]]
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, values[order]
+
+
+def fingerprint(bm):
+    # Element counts plus the verts of a spread of edges, cheap enough to
+    # compute on every call and catches edits that keep the element counts
+    counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+    bm.verts.index_update()
+    bm.edges.ensure_lookup_table()
+    step = max(1, counts[1] // FINGERPRINT_SAMPLES)
+    sample = tuple(vert.index for i in range(0, counts[1], step)
+                   for vert in bm.edges[i].verts)
+    return counts + (hash(sample),)
+
+
+def mesh_fingerprint(mesh):
+    # Same fingerprint as a BMesh of mesh would have, read from Mesh data outside edit mode
+    counts = (len(mesh.vertices), len(mesh.edges), len(mesh.polygons))
+    step = max(1, counts[1] // FINGERPRINT_SAMPLES)
+    sample = tuple(vert for i in range(0, counts[1], step)
+                   for vert in mesh.edges[i].vertices)
+    return counts + (hash(sample),)
+
+
+class TopologyIndex:
+    """
+    CSR adjacency for a BMesh: vert->edge, edge->face, face->edge, face->vert and vert->face.
+    face_edges[k] is the edge between face_verts[k] and the next vert of the face.
+    """
+
+    def __init__(self, bm):
+        bm.verts.index_update()
+        bm.edges.index_update()
+        bm.faces.index_update()
+
+        self.fingerprint = fingerprint(bm)
+        self.num_verts, self.num_edges, self.num_faces = self.fingerprint[:3]
+
+        self.edge_verts = np.fromiter((vert.index for edge in bm.edges for vert in edge.verts),
+                                      dtype=np.int64, count=self.num_edges * 2).reshape(-1, 2)
+
+        face_sizes = np.fromiter((len(face.loops) for face in bm.faces),
+                                 dtype=np.int64, count=self.num_faces)
+        self.face_offsets = np.zeros(self.num_faces + 1, dtype=np.int64)
+        np.cumsum(face_sizes, out=self.face_offsets[1:])
+        corners = int(self.face_offsets[-1])
+
+        self.face_verts = np.fromiter((loop.vert.index for face in bm.faces for loop in face.loops),
+                                      dtype=np.int64, count=corners)
+        self.face_edges = np.fromiter((loop.edge.index for face in bm.faces for loop in face.loops),
+                                      dtype=np.int64, count=corners)
+
+        face_ids = np.repeat(np.arange(self.num_faces, dtype=np.int64), face_sizes)
+        edge_ids = np.repeat(np.arange(self.num_edges, dtype=np.int64), 2)
+
+        self.vert_edge_offsets, self.vert_edges = build_csr(self.edge_verts.ravel(), edge_ids, self.num_verts)
+        self.edge_face_offsets, self.edge_faces = build_csr(self.face_edges, face_ids, self.num_edges)
+        self.vert_face_offsets, self.vert_faces = build_csr(self.face_verts, face_ids, self.num_verts)
+
+        self.edge_face_count = np.diff(self.edge_face_offsets)
+
+        # Border verts have more than one boundary edge, border edges have two border verts
+        boundary_edges = self.edge_face_count == 1
+        boundary_count = np.bincount(self.edge_verts[boundary_edges].ravel(), minlength=self.num_verts)
+        self.border_verts = boundary_count > 1
+        self.border_edges = self.border_verts[self.edge_verts].all(axis=1)
+
+    def edges_of_vert(self, vert):
+        return self.vert_edges[self.vert_edge_offsets[vert]:self.vert_edge_offsets[vert + 1]]
+
+    def faces_of_vert(self, vert):
+        return self.vert_faces[self.vert_face_offsets[vert]:self.vert_face_offsets[vert + 1]]
+
+    def faces_of_edge(self, edge):
+        return self.edge_faces[self.edge_face_offsets[edge]:self.edge_face_offsets[edge + 1]]
+
+    def edges_of_face(self, face):
+        return self.face_edges[self.face_offsets[face]:self.face_offsets[face + 1]]
+
+    def verts_of_face(self, face):
+        return self.face_verts[self.face_offsets[face]:self.face_offsets[face + 1]]
+
+    def per_face_count(self, edge_mask):
+        # Number of masked edges on every face
+        return count_rows(self.face_offsets, self.face_edges, edge_mask)
+
+    def children(self, mode, to):
+        # CSR rows listing the lower dimension elements of every element of mode
+        if mode == 'EDGE' and to == 'VERT':
+            return np.arange(0, self.num_edges * 2 + 1, 2, dtype=np.int64), self.edge_verts.ravel()
+        elif mode == 'FACE' and to == 'VERT':
+            return self.face_offsets, self.face_verts
+        elif mode == 'FACE' and to == 'EDGE':
+            return self.face_offsets, self.face_edges
+
+    def parents(self, mode, to):
+        # CSR rows listing the higher dimension elements using every element of mode
+        if mode == 'VERT' and to == 'EDGE':
+            return self.vert_edge_offsets, self.vert_edges
+        elif mode == 'VERT' and to == 'FACE':
+            return self.vert_face_offsets, self.vert_faces
+        elif mode == 'EDGE' and to == 'FACE':
+            return self.edge_face_offsets, self.edge_faces
+
+    def size(self, mode):
+        return {'VERT': self.num_verts, 'EDGE': self.num_edges, 'FACE': self.num_faces}[mode]
+
+
+def count_rows(offsets, values, mask):
+    # Number of masked values in every CSR row, empty rows count 0
+    rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+    return np.bincount(rows, weights=mask[values], minlength=len(offsets) - 1).astype(np.int64)
+
+
+# Dimension of every selection mode, conversions go up or down in dimension
+DIMENSIONS = {'VERT': 0, 'EDGE': 1, 'FACE': 2}
+
+
+def convert(topo, indexes, mode, to, contained=None):
+    """
+    Converts element indexes from mode to another element type, returns a bool mask over to.
+    contained: converting up (verts to edges...) keeps elements with all their verts/edges selected,
+    otherwise any selected vert/edge is enough. Converting down keeps elements whose every
+    edge/face is selected, otherwise every vert/edge of the selection.
+    Defaults to contained from verts and touching everywhere else, as the modes switch.
+    """
+    if contained is None:
+        contained = mode == 'VERT'
+
+    mask = to_mask(indexes, topo.size(mode))
+
+    if mode == to:
+        return mask
+
+    if DIMENSIONS[to] > DIMENSIONS[mode]:
+        offsets, values = topo.children(to, mode)
+        counts = count_rows(offsets, values, mask)
+        if contained:
+            return counts == np.diff(offsets)
+        return counts > 0
+
+    if contained:
+        offsets, values = topo.parents(to, mode)
+        counts = count_rows(offsets, values, mask)
+        return (counts == np.diff(offsets)) & (counts > 0)
+
+    offsets, values = topo.children(mode, to)
+    result = np.zeros(topo.size(to), dtype=bool)
+    rows = np.repeat(mask, np.diff(offsets))
+    result[values[rows]] = True
+    return result
+
+
+def get_topology(bm=None, obj=None):
+    # Returns the cached index for obj, rebuilding it only if the topology changed
+    if obj is None:
+        obj = itools.get_edit_object()
+
+    if bm is None:
+        bm = itools.get_bmesh(obj)
+
+    topology = cache.get("topology", obj.name)
+    session = itools.sessions.get(obj.name)
+
+    # Inside a session the index is fingerprinted once, after that only the element counts
+    # are compared. Edits trough the session (update_edit_mesh) drop it, mesh operators
+    # used by the tools all change the counts
+    if session is not None and session.topology is not None and session.topology is topology:
+        if topology.fingerprint[:3] == (len(bm.verts), len(bm.edges), len(bm.faces)):
+            return topology
+
+    # The fingerprint catches edits made inside the current operator,
+    # before the depsgraph had a chance to invalidate the entry
+    if topology is None or topology.fingerprint != fingerprint(bm):
+        topology = TopologyIndex(bm)
+        cache.store("topology", obj.name, topology)
+
+    if session is not None:
+        session.topology = topology
+
+    return topology
+
+
+def to_index_array(items):
+    # Accepts BMesh elements or indices
+    items = list(items)
+    if len(items) > 0 and not isinstance(items[0], (int, np.integer)):
+        items = [item.index for item in items]
+    return np.asarray(items, dtype=np.int64)
+
+
+def to_mask(indices, size):
+    mask = np.zeros(size, dtype=bool)
+    mask[indices] = True
+    return mask